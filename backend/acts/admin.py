@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Act
+from .models import Act, ActTombstone, City, Country
 
 
 @admin.register(Act)
@@ -26,3 +26,21 @@ class ActAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'name_key')
+    search_fields = ('name', 'name_key')
+
+
+@admin.register(Country)
+class CountryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'name_key')
+    search_fields = ('name', 'name_key')
+
+
+@admin.register(ActTombstone)
+class ActTombstoneAdmin(admin.ModelAdmin):
+    list_display = ('act_id', 'deleted_at')
+    search_fields = ('act_id',)
@@ -0,0 +1,135 @@
+"""
+Write-coalesced appreciation counters.
+
+Appreciating inserts one deduped Appreciation row (no hot-row update on
+the act) and bumps a per-act pending delta in the cache. ``flush`` runs
+periodically (see the flush_appreciations command), folds unflushed rows
+into Act.appreciation_count with one F() update per distinct delta, and
+then decrements the cached pending deltas by what it flushed, so
+appreciations that arrive meanwhile keep their increments. Reads add the
+cached delta so counts look live between flushes.
+
+Besides the command, ``maybe_flush`` lets the first appreciation after
+FLUSH_INTERVAL seconds trigger a flush, so no extra worker is required.
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Act, Appreciation
+from .stats import record_appreciations
+from .response_cache import bump_data_version
+
+PENDING_KEY = 'act_appreciations_pending:{}'
+PENDING_TIMEOUT = 60 * 60
+FLUSH_BATCH_SIZE = 10000
+FLUSH_INTERVAL = 30
+FLUSH_LOCK_KEY = 'act_appreciations_flush_lock'
+
+
+def _pending_key(act_id):
+    return PENDING_KEY.format(act_id)
+
+
+def appreciate(act, user):
+    """Record an appreciation, returning False if the user already appreciated the act"""
+    try:
+        with transaction.atomic():
+            Appreciation.objects.create(act=act, user=user)
+    except IntegrityError:
+        return False
+
+    key = _pending_key(act.id)
+    cache.add(key, 0, PENDING_TIMEOUT)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Expired between add and incr
+        cache.set(key, 1, PENDING_TIMEOUT)
+    return True
+
+
+def pending_appreciations(act_ids):
+    """Return {act_id: pending delta} for acts with unflushed appreciations"""
+    act_ids = list(act_ids)
+    if not act_ids:
+        return {}
+    cached = cache.get_many([_pending_key(act_id) for act_id in act_ids])
+    pending = {}
+    for act_id in act_ids:
+        delta = cached.get(_pending_key(act_id))
+        if delta and delta > 0:
+            pending[act_id] = delta
+    return pending
+
+
+def live_appreciation_count(act):
+    return act.appreciation_count + pending_appreciations([act.id]).get(act.id, 0)
+
+
+def flush(batch_size=FLUSH_BATCH_SIZE):
+    """Fold unflushed appreciations into Act.appreciation_count, returning how many"""
+    with transaction.atomic():
+        rows = list(
+            Appreciation.objects.select_for_update()
+            .filter(is_flushed=False)
+            .order_by('id')
+            .values_list('id', 'act_id')[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        deltas = defaultdict(int)
+        for _, act_id in rows:
+            deltas[act_id] += 1
+
+        # One UPDATE per distinct delta, usually a handful
+        acts_by_delta = defaultdict(list)
+        for act_id, delta in deltas.items():
+            acts_by_delta[delta].append(act_id)
+        for delta, act_ids in acts_by_delta.items():
+            # Bump updated_at too so delta sync clients pick up the new counts
+            Act.objects.filter(id__in=act_ids).update(
+                appreciation_count=F('appreciation_count') + delta, updated_at=timezone.now()
+            )
+
+        Appreciation.objects.filter(id__in=[row_id for row_id, _ in rows]).update(is_flushed=True)
+        record_appreciations(len(rows))
+        bump_data_version()
+
+        flushed = dict(deltas)
+        transaction.on_commit(lambda: _subtract_pending(flushed))
+
+    return len(rows)
+
+
+def maybe_flush():
+    """Flush if no flush has started in the last FLUSH_INTERVAL seconds"""
+    if cache.add(FLUSH_LOCK_KEY, 1, FLUSH_INTERVAL):
+        return flush()
+    return 0
+
+
+def _subtract_pending(flushed):
+    """Take flushed appreciations off the cached deltas ({act_id: flushed count})"""
+    missing = []
+    for act_id, delta in flushed.items():
+        try:
+            cache.decr(_pending_key(act_id), delta)
+        except ValueError:
+            missing.append(act_id)
+    if not missing:
+        return
+    # Expired or evicted keys: seed them from what is still unflushed, without
+    # overwriting a key an appreciation has recreated meanwhile
+    remaining = dict(
+        Appreciation.objects.filter(act_id__in=missing, is_flushed=False)
+        .values('act_id')
+        .annotate(count=Count('id'))
+        .values_list('act_id', 'count')
+    )
+    for act_id in missing:
+        cache.add(_pending_key(act_id), remaining.get(act_id, 0), PENDING_TIMEOUT)
@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class ActsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'acts'
+    
+    def ready(self):
+        import acts.signals  # Import signals
+        from django.db.models.signals import post_migrate
+        post_migrate.connect(_reinstall_search_index, sender=self)
+
+
+def _reinstall_search_index(using, **kwargs):
+    """SQLite table rebuilds in migrations drop the FTS triggers, put them back"""
+    from django.db import connections
+    from .search import install_search_index, search_index_installed
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and search_index_installed(connection):
+        install_search_index(connection)
@@ -0,0 +1,45 @@
+"""
+Batch act submission.
+
+``bulk_create_acts`` inserts many acts with one bulk_create and then
+brings every derived index up to date once per batch instead of once per
+act: grid cells and location references are filled before the insert,
+and the cluster index, stats rollup, daily counts and tile cache are
+updated with batched statements. Other apps (the tree) react through the
+``acts_bulk_created`` signal.
+"""
+from django.db import transaction
+
+from .clustering import add_many_to_clusters
+from .models import Act, City, Country, location_key
+from .signals import acts_bulk_created
+from .spatial import grid_cell_for
+from .stats import act_day, record_acts_created
+from .tiles import invalidate_tiles_for_points
+from .timeseries import add_daily_counts
+
+MAX_BULK_ACTS = 500
+
+
+def bulk_create_acts(acts):
+    """Insert unsaved Act instances and update everything derived from them"""
+    with transaction.atomic():
+        cities = City.objects.for_names(act.city for act in acts)
+        countries = Country.objects.for_names(act.country for act in acts)
+        for act in acts:
+            act.grid_cell = grid_cell_for(act.latitude, act.longitude)
+            act.city_ref = cities.get(location_key(act.city))
+            act.country_ref = countries.get(location_key(act.country))
+
+        Act.objects.bulk_create(acts)
+
+        add_many_to_clusters((act.latitude, act.longitude, act.category) for act in acts)
+        record_acts_created(acts)
+        add_daily_counts((act_day(act), act.category, act.country, act.city) for act in acts)
+
+        acts_bulk_created.send(sender=Act, acts=acts)
+
+        points = [(act.latitude, act.longitude) for act in acts]
+        transaction.on_commit(lambda: invalidate_tiles_for_points(points))
+
+    return acts
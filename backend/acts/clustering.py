@@ -0,0 +1,184 @@
+"""
+Hierarchical cluster index for the map.
+
+Every act contributes to one ActClusterCell row per zoom level and category.
+At zoom ``z`` the world is divided into a grid of 2 ** (z + CLUSTER_SUBDIVISION)
+cells per side in Web Mercator space, so each map tile holds at most a
+4x4 block of clusters. Rows keep a count and coordinate sums, which makes
+adding or removing an act a constant number of queries and lets the
+clusters endpoint return centroids without touching the Act table.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+
+from .counters import bulk_increment
+from .models import Act, ActClusterCell
+from .spatial import tile_for, tile_fraction
+
+MAX_CLUSTER_ZOOM = 16
+CLUSTER_SUBDIVISION = 2
+# Several screens' worth of tiles (16 cells each); bigger requests should zoom out
+MAX_CLUSTER_CELLS = 4096
+
+
+def clamp_zoom(zoom):
+    return min(MAX_CLUSTER_ZOOM, max(0, int(zoom)))
+
+
+def cluster_cells_for(lat, lng):
+    """Return (zoom, cell_x, cell_y) for every level of the index"""
+    return [
+        (zoom,) + tile_for(lat, lng, zoom + CLUSTER_SUBDIVISION)
+        for zoom in range(MAX_CLUSTER_ZOOM + 1)
+    ]
+
+
+def _cells_q(cells, category):
+    query = Q()
+    for zoom, cell_x, cell_y in cells:
+        query |= Q(zoom=zoom, cell_x=cell_x, cell_y=cell_y)
+    return query & Q(category=category)
+
+
+def add_to_clusters(lat, lng, category, count=1):
+    """Add ``count`` acts at a location to every level of the index"""
+    cells = cluster_cells_for(lat, lng)
+    # Make sure every row exists, then increment them all in one statement
+    ActClusterCell.objects.bulk_create(
+        [
+            ActClusterCell(zoom=zoom, cell_x=cell_x, cell_y=cell_y, category=category)
+            for zoom, cell_x, cell_y in cells
+        ],
+        ignore_conflicts=True,
+    )
+    ActClusterCell.objects.filter(_cells_q(cells, category)).update(
+        count=F('count') + count,
+        latitude_sum=F('latitude_sum') + float(lat) * count,
+        longitude_sum=F('longitude_sum') + float(lng) * count,
+    )
+
+
+def add_many_to_clusters(points):
+    """Add many (lat, lng, category) acts to the index in a few statements"""
+    increments = {}
+    for lat, lng, category in points:
+        lat, lng = float(lat), float(lng)
+        for zoom, cell_x, cell_y in cluster_cells_for(lat, lng):
+            key = (('zoom', zoom), ('cell_x', cell_x), ('cell_y', cell_y), ('category', category))
+            deltas = increments.setdefault(key, {'count': 0, 'latitude_sum': 0.0, 'longitude_sum': 0.0})
+            deltas['count'] += 1
+            deltas['latitude_sum'] += lat
+            deltas['longitude_sum'] += lng
+    bulk_increment(ActClusterCell, increments)
+
+
+def remove_from_clusters(lat, lng, category, count=1):
+    """Remove ``count`` acts at a location from every level of the index"""
+    # Emptied rows are left in place (reads skip them) so a concurrent add
+    # never loses its increment to a delete; rebuild_act_clusters prunes them
+    ActClusterCell.objects.filter(_cells_q(cluster_cells_for(lat, lng), category)).update(
+        count=F('count') - count,
+        latitude_sum=F('latitude_sum') - float(lat) * count,
+        longitude_sum=F('longitude_sum') - float(lng) * count,
+    )
+
+
+def _cell_ranges(min_lng, max_lng, min_lat, max_lat, level):
+    """Return ((x_min, x_max), (y_min, y_max)) cell ranges covering a bbox"""
+    n = 2 ** level
+    # Mercator y grows southwards, so the north edge gives the smaller row
+    _, y_min = tile_fraction(max_lat, min_lng, level)
+    _, y_max = tile_fraction(min_lat, min_lng, level)
+    x_min, _ = tile_fraction(0, min_lng, level)
+    x_max, _ = tile_fraction(0, max_lng, level)
+    y_range = (int(y_min), int(y_max))
+    if min_lng > max_lng:
+        # Box crosses the antimeridian
+        return [(int(x_min), n - 1), (0, int(x_max))], y_range
+    return [(int(x_min), int(x_max))], y_range
+
+
+def get_clusters(min_lng, min_lat, max_lng, max_lat, zoom):
+    """
+    Return pre-aggregated clusters intersecting a bounding box.
+
+    Raises ValueError when the box covers more than MAX_CLUSTER_CELLS cells
+    at that zoom, which bounds the size of a response.
+    """
+    zoom = clamp_zoom(zoom)
+    x_ranges, y_range = _cell_ranges(
+        min_lng, max_lng, min_lat, max_lat, zoom + CLUSTER_SUBDIVISION
+    )
+    cell_count = sum(x_max - x_min + 1 for x_min, x_max in x_ranges) * (y_range[1] - y_range[0] + 1)
+    if cell_count > MAX_CLUSTER_CELLS:
+        raise ValueError(f'Bounding box covers {cell_count} cells at zoom {zoom}, max {MAX_CLUSTER_CELLS}')
+
+    x_q = Q()
+    for x_range in x_ranges:
+        x_q |= Q(cell_x__range=x_range)
+
+    rows = (
+        ActClusterCell.objects.filter(x_q, zoom=zoom, cell_y__range=y_range, count__gt=0)
+        .values_list('cell_x', 'cell_y', 'category', 'count', 'latitude_sum', 'longitude_sum')
+    )
+
+    clusters = {}
+    for cell_x, cell_y, category, count, latitude_sum, longitude_sum in rows:
+        cluster = clusters.setdefault((cell_x, cell_y), {
+            'id': f'{zoom}/{cell_x}/{cell_y}',
+            'count': 0,
+            'latitude_sum': 0.0,
+            'longitude_sum': 0.0,
+            'category_breakdown': {},
+        })
+        cluster['count'] += count
+        cluster['latitude_sum'] += latitude_sum
+        cluster['longitude_sum'] += longitude_sum
+        cluster['category_breakdown'][category] = count
+
+    return [
+        {
+            'id': cluster['id'],
+            'latitude': round(cluster['latitude_sum'] / cluster['count'], 6),
+            'longitude': round(cluster['longitude_sum'] / cluster['count'], 6),
+            'count': cluster['count'],
+            'category_breakdown': cluster['category_breakdown'],
+        }
+        for cluster in clusters.values()
+    ]
+
+
+@transaction.atomic
+def rebuild_clusters():
+    """Recompute the whole cluster index from the Act table"""
+    ActClusterCell.objects.all().delete()
+    totals = {}
+    rows = Act.objects.values_list('latitude', 'longitude', 'category').iterator(chunk_size=2000)
+    for lat, lng, category in rows:
+        lat, lng = float(lat), float(lng)
+        for cell in cluster_cells_for(lat, lng):
+            key = cell + (category,)
+            total = totals.get(key)
+            if total is None:
+                totals[key] = [1, lat, lng]
+            else:
+                total[0] += 1
+                total[1] += lat
+                total[2] += lng
+
+    ActClusterCell.objects.bulk_create(
+        [
+            ActClusterCell(
+                zoom=zoom,
+                cell_x=cell_x,
+                cell_y=cell_y,
+                category=category,
+                count=count,
+                latitude_sum=latitude_sum,
+                longitude_sum=longitude_sum,
+            )
+            for (zoom, cell_x, cell_y, category), (count, latitude_sum, longitude_sum) in totals.items()
+        ],
+        batch_size=2000,
+    )
+    return len(totals)
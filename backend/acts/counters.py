@@ -0,0 +1,43 @@
+"""
+Batched counter increments for the rollup tables.
+
+The single-act paths update one set of counter rows with the same delta.
+Batch writes (bulk act submission) touch many rows with different deltas,
+so ``bulk_increment`` creates any missing rows with one insert-ignore and
+then applies all deltas with a CASE expression per field, a handful of
+statements regardless of how many acts were written.
+"""
+from django.db.models import Case, F, Q, Value, When
+
+UPDATE_CHUNK_SIZE = 100
+
+
+def bulk_increment(model, increments):
+    """
+    Apply ``{lookup: {field: delta}}`` increments to counter rows, where each
+    lookup is a tuple of (field, value) pairs identifying one unique row.
+    """
+    if not increments:
+        return
+
+    model.objects.bulk_create(
+        [model(**dict(lookup)) for lookup in increments],
+        ignore_conflicts=True,
+        batch_size=500,
+    )
+
+    items = list(increments.items())
+    for start in range(0, len(items), UPDATE_CHUNK_SIZE):
+        chunk = items[start:start + UPDATE_CHUNK_SIZE]
+        rows_q = Q()
+        whens = {}
+        for lookup, deltas in chunk:
+            condition = Q(**dict(lookup))
+            rows_q |= condition
+            for field, delta in deltas.items():
+                whens.setdefault(field, []).append(When(condition, then=Value(delta)))
+
+        model.objects.filter(rows_q).update(**{
+            field: F(field) + Case(*field_whens, default=Value(0), output_field=model._meta.get_field(field))
+            for field, field_whens in whens.items()
+        })
@@ -0,0 +1,115 @@
+"""
+Streaming export of acts as CSV or newline-delimited JSON.
+
+Rows are read with a chunked ``iterator()`` (a server-side cursor on
+PostgreSQL) and serialized one chunk at a time through the fast read path,
+so memory stays flat no matter how many acts match. The response body is a
+generator handed to ``StreamingHttpResponse`` and can be gzipped on the fly.
+"""
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.text import compress_sequence
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .serializers import act_rows, serialize_act_rows
+
+EXPORT_CHUNK_SIZE = 2000
+
+CSV_COLUMNS = (
+    'id',
+    'description',
+    'category',
+    'category_display',
+    'latitude',
+    'longitude',
+    'city',
+    'country',
+    'evidence_url',
+    'submitted_by',
+    'username',
+    'is_anonymous',
+    'appreciation_count',
+    'created_at',
+    'updated_at',
+)
+
+
+class _ExportRenderer(BaseRenderer):
+    """
+    Lets DRF content negotiation accept ?format=csv|ndjson.
+
+    Successful exports bypass rendering entirely; only error payloads are
+    rendered here, as JSON.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data, renderer_context=renderer_context)
+
+
+class CSVRenderer(_ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(_ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class _Echo:
+    """File-like object that hands back whatever csv.writer writes"""
+
+    def write(self, value):
+        return value
+
+
+def _chunks(queryset, chunk_size, fields=None):
+    chunk = []
+    for row in act_rows(queryset, fields).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield serialize_act_rows(chunk, fields)
+            chunk = []
+    if chunk:
+        yield serialize_act_rows(chunk, fields)
+
+
+def iter_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE, fields=None):
+    """Yield the export as CSV text, one chunk of rows per item"""
+    columns = [column for column in CSV_COLUMNS if fields is None or column in fields]
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for acts in _chunks(queryset, chunk_size, fields):
+        yield ''.join(writer.writerow([act[column] for column in columns]) for act in acts)
+
+
+def iter_ndjson(queryset, chunk_size=EXPORT_CHUNK_SIZE, fields=None):
+    """Yield the export as newline-delimited JSON, one chunk of rows per item"""
+    for acts in _chunks(queryset, chunk_size, fields):
+        yield ''.join(json.dumps(act, ensure_ascii=False) + '\n' for act in acts)
+
+
+def export_response(queryset, export_format, gzip=False, fields=None):
+    """Build a streaming download response for a queryset of acts"""
+    if export_format == 'csv':
+        content = iter_csv(queryset, fields=fields)
+        content_type = 'text/csv; charset=utf-8'
+    else:
+        content = iter_ndjson(queryset, fields=fields)
+        content_type = 'application/x-ndjson; charset=utf-8'
+
+    content = (text.encode('utf-8') for text in content)
+    if gzip:
+        content = compress_sequence(content)
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    filename = f"acts_{timezone.now():%Y-%m-%d}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Vary'] = 'Accept-Encoding'
+    if gzip:
+        response['Content-Encoding'] = 'gzip'
+    return response
@@ -0,0 +1,191 @@
+"""
+Live feed of newly created acts, streamed as Server-Sent Events over ASGI.
+
+Each worker keeps an in-process pub/sub hub. Act post_save (after commit)
+serializes the new act once and hands it to every subscription whose
+bbox/category filter matches; delivery hops onto the subscriber's event
+loop with ``call_soon_threadsafe`` because signals fire in sync threads.
+
+Backpressure: every subscription has a bounded queue. When a slow client
+lets it fill up, further events are dropped and the client is sent an
+``overflow`` event telling it to catch up through /api/acts/changes/.
+Connections are capped per worker and closed after LIVE_MAX_SECONDS
+(EventSource reconnects on its own), which also bounds subscriptions left
+behind by clients that vanished without the server noticing.
+
+Streaming needs the ASGI entry point (see Procfile); under WSGI Django
+buffers async responses, so the feed only arrives when the stream closes.
+Django 4.2 does not watch for client disconnects while streaming, so the
+ASGI application is wrapped in ``cancel_on_disconnect``, which cancels a
+live request once its client goes away and thereby unsubscribes it.
+"""
+import asyncio
+import json
+import threading
+import time
+
+from .serializers import ActSerializer
+
+LIVE_MAX_SUBSCRIBERS = 200
+LIVE_QUEUE_SIZE = 100
+LIVE_KEEPALIVE_SECONDS = 15
+LIVE_MAX_SECONDS = 300
+LIVE_RETRY_MS = 3000
+LIVE_PATH_PREFIX = '/api/acts/live/'
+
+
+class Subscription:
+    """One connected client: its filters, event loop and bounded queue"""
+
+    def __init__(self, loop, category=None, bbox=None):
+        self.loop = loop
+        self.category = category
+        self.bbox = bbox  # (min_lng, min_lat, max_lng, max_lat)
+        self.queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        self.overflowed = False
+
+    def matches(self, event):
+        if self.category and event['category'] != self.category:
+            return False
+        if self.bbox is None:
+            return True
+        min_lng, min_lat, max_lng, max_lat = self.bbox
+        if not min_lat <= event['latitude'] <= max_lat:
+            return False
+        if min_lng <= max_lng:
+            return min_lng <= event['longitude'] <= max_lng
+        # Box crossing the antimeridian
+        return event['longitude'] >= min_lng or event['longitude'] <= max_lng
+
+    def offer(self, event):
+        """Queue an event without blocking; runs on the subscriber's loop"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class LiveFeed:
+    """In-process fan-out hub shared by every live connection in a worker"""
+
+    def __init__(self, max_subscribers=LIVE_MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, category=None, bbox=None):
+        """Register a subscription on the running loop, or return None when full"""
+        subscription = Subscription(asyncio.get_running_loop(), category, bbox)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if not subscription.matches(event):
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                self.unsubscribe(subscription)
+
+
+feed = LiveFeed()
+
+
+def publish_acts(acts):
+    """Push newly created acts to matching live subscribers"""
+    if not feed.subscriber_count():
+        return
+    for act in acts:
+        feed.publish({
+            'id': act.pk,
+            'category': act.category,
+            'latitude': float(act.latitude),
+            'longitude': float(act.longitude),
+            'data': json.dumps(ActSerializer(act).data),
+        })
+
+
+def _sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {data}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def stream(subscription):
+    """Yield SSE frames for a subscription until LIVE_MAX_SECONDS have passed"""
+    deadline = time.monotonic() + LIVE_MAX_SECONDS
+    try:
+        yield f'retry: {LIVE_RETRY_MS}\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=min(LIVE_KEEPALIVE_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield _sse('act', event['data'], event_id=event['id'])
+            if subscription.overflowed and subscription.queue.empty():
+                # Events were dropped while the client lagged; it should resync
+                subscription.overflowed = False
+                yield _sse('overflow', '{}')
+    finally:
+        feed.unsubscribe(subscription)
+
+
+def cancel_on_disconnect(app, path_prefix=LIVE_PATH_PREFIX):
+    """Wrap an ASGI app so live requests are cancelled when the client disconnects"""
+    async def wrapper(scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(path_prefix):
+            return await app(scope, receive, send)
+
+        body_read = asyncio.Event()
+
+        async def app_receive():
+            message = await receive()
+            if message['type'] != 'http.request' or not message.get('more_body'):
+                body_read.set()
+            return message
+
+        async def watch(task):
+            # Django stops reading once it has the body; everything after that
+            # on this connection is the disconnect
+            await body_read.wait()
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            task.cancel()
+
+        task = asyncio.ensure_future(app(scope, app_receive, send))
+        watcher = asyncio.ensure_future(watch(task))
+        try:
+            await task
+        except asyncio.CancelledError:
+            if not task.cancelled() or not watcher.done():
+                # Cancelled from outside rather than by a disconnect
+                task.cancel()
+                raise
+        finally:
+            watcher.cancel()
+
+    return wrapper
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from acts.models import Act
+from acts.spatial import grid_cell_for
+
+
+class Command(BaseCommand):
+    help = 'Populate Act.grid_cell for rows saved before the spatial grid existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute every row instead of only rows missing a grid cell',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows updated per query',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Act.objects.all() if options['all'] else Act.objects.filter(grid_cell__isnull=True)
+        batch_size = options['batch_size']
+
+        batch = []
+        updated = 0
+        for act in queryset.only('id', 'latitude', 'longitude').order_by('id').iterator(chunk_size=batch_size):
+            act.grid_cell = grid_cell_for(act.latitude, act.longitude)
+            batch.append(act)
+            if len(batch) >= batch_size:
+                Act.objects.bulk_update(batch, ['grid_cell'])
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            Act.objects.bulk_update(batch, ['grid_cell'])
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Updated grid cell for {updated} acts'))
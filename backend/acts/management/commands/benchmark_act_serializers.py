@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from acts.models import Act
+from acts.serializers import ActSerializer, serialize_acts
+
+
+class Command(BaseCommand):
+    help = 'Compare ActSerializer with the fast read path on existing acts (per-row cost and output equality)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Acts per page (default: 100)')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed iterations per serializer')
+
+    def _time(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+        queryset = Act.objects.order_by('-created_at')[:rows]
+        count = len(queryset)
+        if not count:
+            raise CommandError('No acts in the database to benchmark against')
+
+        def drf():
+            return ActSerializer(queryset.all(), many=True).data
+
+        def fast():
+            return serialize_acts(queryset.all())
+
+        renderer = JSONRenderer()
+        if renderer.render(drf()) != renderer.render(fast()):
+            raise CommandError('Fast read path output differs from ActSerializer')
+
+        with CaptureQueriesContext(connection) as drf_queries:
+            drf()
+        with CaptureQueriesContext(connection) as fast_queries:
+            fast()
+
+        drf_time = self._time(drf, repeat)
+        fast_time = self._time(fast, repeat)
+
+        self.stdout.write(f'Rows per page: {count} (output identical)')
+        self.stdout.write(
+            f'ActSerializer:  {drf_time * 1000:8.2f} ms/page  {drf_time / count * 1e6:8.1f} us/row  '
+            f'{len(drf_queries)} queries'
+        )
+        self.stdout.write(
+            f'Fast read path: {fast_time * 1000:8.2f} ms/page  {fast_time / count * 1e6:8.1f} us/row  '
+            f'{len(fast_queries)} queries'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {drf_time / fast_time:.1f}x'))
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from acts.models import Act
+from acts.serializers import ActSerializer
+from tree.models import TreeDecoration
+from tree.serializers import TreeDecorationSerializer
+from santa_project.renderers import ORJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = 'Compare the orjson renderer with DRF JSONRenderer on ActSerializer and TreeDecorationSerializer output'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Objects per payload (default: 100)')
+        parser.add_argument('--repeat', type=int, default=200, help='Timed iterations per renderer')
+
+    def _time(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def _compare(self, label, data, repeat):
+        default = JSONRenderer()
+        fast = ORJSONRenderer()
+        # Both renderers must agree on the decoded payload
+        if orjson.loads(default.render(data)) != orjson.loads(fast.render(data)):
+            raise CommandError(f'{label}: orjson output differs from JSONRenderer')
+
+        default_time = self._time(lambda: default.render(data), repeat)
+        fast_time = self._time(lambda: fast.render(data), repeat)
+        self.stdout.write(f'{label} ({len(data)} objects, {len(fast.render(data))} bytes)')
+        self.stdout.write(f'  JSONRenderer:   {default_time * 1000:8.3f} ms')
+        self.stdout.write(f'  ORJSONRenderer: {fast_time * 1000:8.3f} ms')
+        self.stdout.write(self.style.SUCCESS(f'  Speedup: {default_time / fast_time:.1f}x'))
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed')
+
+        rows = options['rows']
+        repeat = options['repeat']
+        payloads = [
+            ('ActSerializer', ActSerializer, Act.objects.select_related('user').order_by('-created_at')),
+            ('TreeDecorationSerializer', TreeDecorationSerializer, TreeDecoration.objects.order_by('-created_at')),
+        ]
+
+        compared = 0
+        for label, serializer_class, queryset in payloads:
+            data = serializer_class(queryset[:rows], many=True).data
+            if not data:
+                self.stdout.write(self.style.WARNING(f'{label}: no rows in the database, skipped'))
+                continue
+            self._compare(label, data, repeat)
+            compared += 1
+
+        if not compared:
+            raise CommandError('No acts or tree decorations in the database to benchmark against')
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from acts.appreciations import flush
+
+
+class Command(BaseCommand):
+    help = 'Fold buffered appreciations into Act.appreciation_count'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Keep running and flush every N seconds (default: flush once and exit)',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            flushed = 0
+            while True:
+                batch = flush()
+                flushed += batch
+                if not batch:
+                    break
+            if flushed or not interval:
+                self.stdout.write(f'Flushed {flushed} appreciations')
+            if not interval:
+                return
+            time.sleep(interval)
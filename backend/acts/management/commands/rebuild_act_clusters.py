@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from acts.clustering import rebuild_clusters
+from acts.models import ActClusterCell
+
+
+class Command(BaseCommand):
+    help = 'Recompute the map cluster index from the Act table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--if-empty',
+            action='store_true',
+            help='Only build the index when it has no rows yet',
+        )
+
+    def handle(self, *args, **options):
+        if options['if_empty'] and ActClusterCell.objects.exists():
+            self.stdout.write('Cluster index already populated, skipping')
+            return
+
+        cells = rebuild_clusters()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt cluster index with {cells} cells'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from acts.models import ActStats
+from acts.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the global stats rollup from the Act table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--if-empty',
+            action='store_true',
+            help='Only build the rollup when it does not exist yet',
+        )
+
+    def handle(self, *args, **options):
+        if options['if_empty'] and ActStats.objects.exists():
+            self.stdout.write('Stats rollup already populated, skipping')
+            return
+
+        stats = rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats rollup for {stats.total_acts} acts'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from acts.models import ActDailyCount
+from acts.timeseries import rebuild_timeseries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily act count rollup from the Act table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--if-empty',
+            action='store_true',
+            help='Only build the rollup when it has no rows yet',
+        )
+
+    def handle(self, *args, **options):
+        if options['if_empty'] and ActDailyCount.objects.exists():
+            self.stdout.write('Daily rollup already populated, skipping')
+            return
+
+        buckets = rebuild_timeseries()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt daily rollup with {buckets} buckets'))
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acts', '0002_act_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='act',
+            name='grid_cell',
+            field=models.IntegerField(blank=True, editable=False, help_text='Spatial grid cell id derived from latitude/longitude', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='act',
+            index=models.Index(fields=['grid_cell'], name='acts_act_grid_ce_cc389b_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acts', '0003_act_grid_cell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActClusterCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField(help_text='Map zoom level of this cell')),
+                ('cell_x', models.IntegerField(help_text='Cell column in Web Mercator space')),
+                ('cell_y', models.IntegerField(help_text='Cell row in Web Mercator space')),
+                ('category', models.CharField(choices=[('food', 'Food'), ('clothing', 'Clothing'), ('time', 'Time/Volunteer'), ('money', 'Money'), ('other', 'Other')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('latitude_sum', models.FloatField(default=0)),
+                ('longitude_sum', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='actclustercell',
+            constraint=models.UniqueConstraint(fields=('zoom', 'cell_x', 'cell_y', 'category'), name='unique_act_cluster_cell'),
+        ),
+    ]
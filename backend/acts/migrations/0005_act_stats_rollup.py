@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acts', '0004_actclustercell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_acts', models.IntegerField(default=0)),
+                ('total_appreciations', models.BigIntegerField(default=0)),
+                ('total_cities', models.IntegerField(default=0)),
+                ('total_countries', models.IntegerField(default=0)),
+                ('top_city', models.CharField(blank=True, max_length=100, null=True)),
+                ('top_city_count', models.IntegerField(default=0)),
+                ('category_breakdown', models.JSONField(default=dict)),
+                ('stats_date', models.DateField(blank=True, help_text='Day that acts_today refers to', null=True)),
+                ('acts_today', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Act stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='ActStatsCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('city', 'City'), ('country', 'Country'), ('category', 'Category'), ('day', 'Day')], max_length=20)),
+                ('key', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', '-count'], name='acts_actsta_kind_c61944_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='actstatscounter',
+            constraint=models.UniqueConstraint(fields=('kind', 'key'), name='unique_act_stats_counter'),
+        ),
+    ]
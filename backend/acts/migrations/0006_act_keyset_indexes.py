@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acts', '0005_act_stats_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='act',
+            index=models.Index(fields=['created_at', 'id'], name='acts_act_created_9b2565_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='act',
+            index=models.Index(fields=['appreciation_count', 'id'], name='acts_act_appreci_ee8cb0_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:02
+
+from django.db import migrations
+
+# Frozen copy of the search structures as of this migration; acts.search may
+# change later without rewriting history.
+POSTGRES_INSTALL = [
+    """
+    ALTER TABLE acts_act ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(city, '') || ' ' || coalesce(country, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(submitted_by, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS acts_act_search_vector_gin ON acts_act USING GIN (search_vector)",
+]
+POSTGRES_REMOVE = [
+    "DROP INDEX IF EXISTS acts_act_search_vector_gin",
+    "ALTER TABLE acts_act DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS acts_act_fts USING fts5(
+        description, city, country, submitted_by,
+        content='acts_act', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS acts_act_fts_ai AFTER INSERT ON acts_act BEGIN
+        INSERT INTO acts_act_fts(rowid, description, city, country, submitted_by)
+        VALUES (new.id, new.description, new.city, new.country, new.submitted_by);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS acts_act_fts_ad AFTER DELETE ON acts_act BEGIN
+        INSERT INTO acts_act_fts(acts_act_fts, rowid, description, city, country, submitted_by)
+        VALUES ('delete', old.id, old.description, old.city, old.country, old.submitted_by);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS acts_act_fts_au
+    AFTER UPDATE OF description, city, country, submitted_by ON acts_act BEGIN
+        INSERT INTO acts_act_fts(acts_act_fts, rowid, description, city, country, submitted_by)
+        VALUES ('delete', old.id, old.description, old.city, old.country, old.submitted_by);
+        INSERT INTO acts_act_fts(rowid, description, city, country, submitted_by)
+        VALUES (new.id, new.description, new.city, new.country, new.submitted_by);
+    END
+    """,
+    "INSERT INTO acts_act_fts(acts_act_fts) VALUES ('rebuild')",
+]
+SQLITE_REMOVE = [
+    "DROP TRIGGER IF EXISTS acts_act_fts_ai",
+    "DROP TRIGGER IF EXISTS acts_act_fts_ad",
+    "DROP TRIGGER IF EXISTS acts_act_fts_au",
+    "DROP TABLE IF EXISTS acts_act_fts",
+]
+
+
+def _run(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            cursor.execute(sql)
+
+
+def install_search_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRES_INSTALL, 'sqlite': SQLITE_INSTALL})
+
+
+def remove_search_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRES_REMOVE, 'sqlite': SQLITE_REMOVE})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acts', '0006_act_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, remove_search_index),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_locations(apps, schema_editor):
+    """Create City/Country rows for existing acts and point the acts at them"""
+    Act = apps.get_model('acts', 'Act')
+    for field, model_name in (('city', 'City'), ('country', 'Country')):
+        Location = apps.get_model('acts', model_name)
+        locations = {}
+        for name in Act.objects.exclude(**{field: ''}).values_list(field, flat=True).distinct():
+            key = ' '.join(name.split()).casefold()
+            if not key:
+                continue
+            if key not in locations:
+                locations[key], _ = Location.objects.get_or_create(
+                    name_key=key, defaults={'name': ' '.join(name.split())}
+                )
+            Act.objects.filter(**{field: name}).update(**{f'{field}_ref': locations[key]})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acts', '0007_act_full_text_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='City',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Display name as first submitted', max_length=100)),
+                ('name_key', models.CharField(help_text='Case-folded name used for lookups', max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Cities',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Country',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Display name as first submitted', max_length=100)),
+                ('name_key', models.CharField(help_text='Case-folded name used for lookups', max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Countries',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='act',
+            name='city_ref',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Normalized city, derived from city', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='acts', to='acts.city'),
+        ),
+        migrations.AddField(
+            model_name='act',
+            name='country_ref',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Normalized country, derived from country', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='acts', to='acts.country'),
+        ),
+        migrations.AddIndex(
+            model_name='act',
+            index=models.Index(fields=['city_ref', 'created_at'], name='acts_act_city_re_eb7845_idx'),
+        ),
+        migrations.RunPython(populate_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acts', '0008_city_country_dimensions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(choices=[('food', 'Food'), ('clothing', 'Clothing'), ('time', 'Time/Volunteer'), ('money', 'Money'), ('other', 'Other')], max_length=20)),
+                ('country_key', models.CharField(blank=True, help_text='Case-folded country name, empty if unknown', max_length=100)),
+                ('city_key', models.CharField(blank=True, help_text='Case-folded city name, empty if unknown', max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['country_key', 'date'], name='acts_actdai_country_ad3a68_idx'), models.Index(fields=['city_key', 'date'], name='acts_actdai_city_ke_109a2d_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='actdailycount',
+            constraint=models.UniqueConstraint(fields=('date', 'category', 'country_key', 'city_key'), name='unique_act_daily_count'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('acts', '0009_act_daily_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Appreciation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_flushed', models.BooleanField(default=False, help_text='Whether this is counted in Act.appreciation_count')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('act', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appreciations', to='acts.act')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appreciations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('is_flushed', False)), fields=['act'], name='acts_appreciation_pending_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='appreciation',
+            constraint=models.UniqueConstraint(fields=('act', 'user'), name='unique_appreciation_per_user'),
+        ),
+    ]
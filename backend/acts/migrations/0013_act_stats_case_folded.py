@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:18
+
+from django.db import migrations
+
+
+def fold_location_counters(apps, schema_editor):
+    """Merge city/country stats counters whose names differ only in case or spacing"""
+    ActStats = apps.get_model('acts', 'ActStats')
+    ActStatsCounter = apps.get_model('acts', 'ActStatsCounter')
+
+    distinct = {}
+    for kind in ('city', 'country'):
+        counters = list(ActStatsCounter.objects.filter(kind=kind))
+        folded = {}
+        for counter in counters:
+            key = ' '.join(counter.key.split()).casefold()
+            if key:
+                folded[key] = folded.get(key, 0) + counter.count
+        ActStatsCounter.objects.filter(kind=kind).delete()
+        ActStatsCounter.objects.bulk_create(
+            [ActStatsCounter(kind=kind, key=key, count=count) for key, count in folded.items()],
+            batch_size=1000,
+        )
+        distinct[kind] = sum(1 for count in folded.values() if count > 0)
+
+    ActStats.objects.filter(pk=1).update(total_cities=distinct['city'], total_countries=distinct['country'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acts', '0012_cache_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_location_counters, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='actstats',
+            name='acts_today',
+        ),
+        migrations.RemoveField(
+            model_name='actstats',
+            name='category_breakdown',
+        ),
+        migrations.RemoveField(
+            model_name='actstats',
+            name='stats_date',
+        ),
+        migrations.RemoveField(
+            model_name='actstats',
+            name='top_city',
+        ),
+        migrations.RemoveField(
+            model_name='actstats',
+            name='top_city_count',
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:40
+
+from django.db import migrations
+
+# Only reindex an act when a searched column changes, not on every update
+# (appreciation counter flushes and grid cell saves write acts_act too).
+SQLITE_UPDATE_TRIGGER = """
+    CREATE TRIGGER acts_act_fts_au
+    AFTER UPDATE OF description, city, country, submitted_by ON acts_act BEGIN
+        INSERT INTO acts_act_fts(acts_act_fts, rowid, description, city, country, submitted_by)
+        VALUES ('delete', old.id, old.description, old.city, old.country, old.submitted_by);
+        INSERT INTO acts_act_fts(rowid, description, city, country, submitted_by)
+        VALUES (new.id, new.description, new.city, new.country, new.submitted_by);
+    END
+"""
+SQLITE_PREVIOUS_UPDATE_TRIGGER = """
+    CREATE TRIGGER acts_act_fts_au AFTER UPDATE ON acts_act BEGIN
+        INSERT INTO acts_act_fts(acts_act_fts, rowid, description, city, country, submitted_by)
+        VALUES ('delete', old.id, old.description, old.city, old.country, old.submitted_by);
+        INSERT INTO acts_act_fts(rowid, description, city, country, submitted_by)
+        VALUES (new.id, new.description, new.city, new.country, new.submitted_by);
+    END
+"""
+
+
+def _replace_update_trigger(schema_editor, sql):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM sqlite_master WHERE name = 'acts_act_fts'")
+        if not cursor.fetchone()[0]:
+            return
+        cursor.execute("DROP TRIGGER IF EXISTS acts_act_fts_au")
+        cursor.execute(sql)
+
+
+def narrow_update_trigger(apps, schema_editor):
+    _replace_update_trigger(schema_editor, SQLITE_UPDATE_TRIGGER)
+
+
+def widen_update_trigger(apps, schema_editor):
+    _replace_update_trigger(schema_editor, SQLITE_PREVIOUS_UPDATE_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acts', '0013_act_stats_case_folded'),
+    ]
+
+    operations = [
+        migrations.RunPython(narrow_update_trigger, widen_update_trigger),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from .spatial import grid_cell_for
 
 
 class Category(models.TextChoices):
@@ -10,6 +11,64 @@ class Category(models.TextChoices):
     OTHER = 'other', 'Other'
 
 
+def location_key(name):
+    """Case-folded lookup key for city and country names"""
+    return ' '.join((name or '').split()).casefold()
+
+
+class LocationManager(models.Manager):
+    def for_name(self, name):
+        """Return the row for a name (matched case-insensitively), creating it if needed"""
+        key = location_key(name)
+        if not key:
+            return None
+        location, _ = self.get_or_create(name_key=key, defaults={'name': ' '.join(name.split())})
+        return location
+    
+    def for_names(self, names):
+        """Return {name_key: row} for many names, creating missing rows in one insert"""
+        display_names = {}
+        for name in names:
+            key = location_key(name)
+            if key:
+                display_names.setdefault(key, ' '.join(name.split()))
+        if not display_names:
+            return {}
+        self.bulk_create(
+            [self.model(name=name, name_key=key) for key, name in display_names.items()],
+            ignore_conflicts=True,
+        )
+        return self.in_bulk(list(display_names), field_name='name_key')
+
+
+class Country(models.Model):
+    name = models.CharField(max_length=100, help_text="Display name as first submitted")
+    name_key = models.CharField(max_length=100, unique=True, help_text="Case-folded name used for lookups")
+    
+    objects = LocationManager()
+    
+    class Meta:
+        verbose_name_plural = 'Countries'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class City(models.Model):
+    name = models.CharField(max_length=100, help_text="Display name as first submitted")
+    name_key = models.CharField(max_length=100, unique=True, help_text="Case-folded name used for lookups")
+    
+    objects = LocationManager()
+    
+    class Meta:
+        verbose_name_plural = 'Cities'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
 class Act(models.Model):
     description = models.TextField(help_text="Description of the act of kindness")
     category = models.CharField(
@@ -29,8 +88,32 @@ class Act(models.Model):
         decimal_places=6,
         help_text="Longitude coordinate"
     )
+    grid_cell = models.IntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Spatial grid cell id derived from latitude/longitude"
+    )
     city = models.CharField(max_length=100, blank=True, help_text="City name")
     country = models.CharField(max_length=100, blank=True, help_text="Country name")
+    city_ref = models.ForeignKey(
+        City,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='acts',
+        help_text="Normalized city, derived from city"
+    )
+    country_ref = models.ForeignKey(
+        Country,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='acts',
+        help_text="Normalized country, derived from country"
+    )
     
     # User relationship
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='acts', help_text="User who submitted this act")
@@ -54,8 +137,182 @@ class Act(models.Model):
             models.Index(fields=['category']),
             models.Index(fields=['created_at']),
             models.Index(fields=['city']),
+            models.Index(fields=['grid_cell']),
+            # Keyset pagination keys, see acts/pagination.py
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['appreciation_count', 'id']),
+            models.Index(fields=['city_ref', 'created_at']),
+            # Delta sync key, see acts/changes.py
+            models.Index(fields=['updated_at', 'id']),
         ]
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values so post_save receivers can see what changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Keep the spatial grid cell in sync with the coordinates
+        self.grid_cell = grid_cell_for(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and ({'latitude', 'longitude'} & set(update_fields)):
+            kwargs['update_fields'] = set(update_fields) | {'grid_cell'}
+        # Keep the normalized location references in sync with the names
+        if update_fields is None or ({'city', 'country'} & set(update_fields)):
+            self.resolve_locations()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'city_ref', 'country_ref'}
+        # appreciation_count only changes through F() flushes (see appreciations.py);
+        # never write back a possibly stale in-memory value on a full save
+        if update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = {
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'appreciation_count'
+            }
+        # Derived indexes are maintained by post_save receivers in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields
+        }
+    
+    def resolve_locations(self):
+        """Point city_ref/country_ref at the dimension rows for city/country"""
+        if self.city_ref_id is None or self.previous_value('city') != self.city:
+            self.city_ref = City.objects.for_name(self.city)
+        if self.country_ref_id is None or self.previous_value('country') != self.country:
+            self.country_ref = Country.objects.for_name(self.country)
+    
+    def previous_value(self, field_name):
+        """Value of a field as last loaded from or saved to the database"""
+        return getattr(self, '_loaded_values', {}).get(field_name)
+    
     def __str__(self):
         city_display = self.city if self.city else "Unknown"
         return f"{self.get_category_display()} - {city_display}"
+
+
+class ActClusterCell(models.Model):
+    """Per-category act count and coordinate sums for one map cluster cell"""
+    zoom = models.PositiveSmallIntegerField(help_text="Map zoom level of this cell")
+    cell_x = models.IntegerField(help_text="Cell column in Web Mercator space")
+    cell_y = models.IntegerField(help_text="Cell row in Web Mercator space")
+    category = models.CharField(max_length=20, choices=Category.choices)
+    count = models.IntegerField(default=0)
+    latitude_sum = models.FloatField(default=0)
+    longitude_sum = models.FloatField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['zoom', 'cell_x', 'cell_y', 'category'],
+                name='unique_act_cluster_cell',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.zoom}/{self.cell_x}/{self.cell_y} {self.category}: {self.count}"
+
+
+class ActStats(models.Model):
+    """Single-row running totals served by /api/acts/stats/ (updated with F() deltas)"""
+    total_acts = models.IntegerField(default=0)
+    total_appreciations = models.BigIntegerField(default=0)
+    total_cities = models.IntegerField(default=0)
+    total_countries = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Act stats'
+    
+    def __str__(self):
+        return f"Act stats ({self.total_acts} acts)"
+
+
+class ActStatsCounter(models.Model):
+    """Act count per city, country (keyed by location_key), category or day"""
+    KIND_CITY = 'city'
+    KIND_COUNTRY = 'country'
+    KIND_CATEGORY = 'category'
+    KIND_DAY = 'day'
+    KIND_CHOICES = [
+        (KIND_CITY, 'City'),
+        (KIND_COUNTRY, 'Country'),
+        (KIND_CATEGORY, 'Category'),
+        (KIND_DAY, 'Day'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    key = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'key'], name='unique_act_stats_counter'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', '-count']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.key}: {self.count}"
+
+
+class ActDailyCount(models.Model):
+    """Acts per day, category, country and city for time-series charts"""
+    date = models.DateField()
+    category = models.CharField(max_length=20, choices=Category.choices)
+    country_key = models.CharField(max_length=100, blank=True, help_text="Case-folded country name, empty if unknown")
+    city_key = models.CharField(max_length=100, blank=True, help_text="Case-folded city name, empty if unknown")
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'category', 'country_key', 'city_key'],
+                name='unique_act_daily_count',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['country_key', 'date']),
+            models.Index(fields=['city_key', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.category} {self.city_key or '-'}/{self.country_key or '-'}: {self.count}"
+
+
+class Appreciation(models.Model):
+    """
+    One user's appreciation of an act. The unique constraint dedupes per user,
+    and unflushed rows are the durable buffer behind Act.appreciation_count.
+    """
+    act = models.ForeignKey(Act, on_delete=models.CASCADE, related_name='appreciations')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='appreciations')
+    is_flushed = models.BooleanField(default=False, help_text="Whether this is counted in Act.appreciation_count")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['act', 'user'], name='unique_appreciation_per_user'),
+        ]
+        indexes = [
+            models.Index(fields=['act'], condition=models.Q(is_flushed=False), name='acts_appreciation_pending_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} appreciated act {self.act_id}"
+
+
+class ActTombstone(models.Model):
+    """Records a deleted act so delta sync clients can drop it from their local store"""
+    act_id = models.BigIntegerField(unique=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['deleted_at']
+    
+    def __str__(self):
+        return f"Act {self.act_id} deleted at {self.deleted_at}"
@@ -0,0 +1,121 @@
+"""
+Keyset (cursor) pagination for act lists.
+
+Opt in with ``?pagination=cursor``. Pages are ordered by one of the
+ActViewSet ``ordering_fields`` with ``id`` as a tie-breaker and each page
+resumes strictly after the last ``(value, id)`` pair of the previous one.
+With the matching composite indexes every page is an index range scan of
+``page_size + 1`` rows, with no COUNT(*) and no OFFSET, so deep scrolling
+costs the same as page one.
+"""
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+KEYSET_FIELDS = ('created_at', 'appreciation_count')
+DEFAULT_KEYSET_ORDERING = '-created_at'
+
+
+class ActKeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request, queryset, view):
+        """Use the request's ?ordering= if it is keyset-capable, else newest first"""
+        ordering = OrderingFilter().get_ordering(request, queryset, view) or []
+        if ordering and ordering[0].lstrip('-') in KEYSET_FIELDS:
+            return ordering[0]
+        return DEFAULT_KEYSET_ORDERING
+
+    def encode_cursor(self, ordering, value, pk):
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        payload = json.dumps([ordering, value, pk], separators=(',', ':'))
+        return b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request, ordering):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor_ordering, value, pk = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if cursor_ordering != ordering:
+                raise ValueError('Cursor belongs to a different ordering')
+            if ordering.lstrip('-') == 'created_at':
+                value = parse_datetime(value)
+                if value is None:
+                    raise ValueError('Bad timestamp')
+            else:
+                value = int(value)
+            return value, int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(request, queryset, view)
+        field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+        prefix = '-' if descending else ''
+
+        queryset = queryset.order_by(self.ordering, f'{prefix}id')
+
+        position = self.decode_cursor(request, self.ordering)
+        if position is not None:
+            value, pk = position
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': pk})
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        field = self.ordering.lstrip('-')
+        # Pages may hold model instances or values() rows from the fast read path
+        if isinstance(last, dict):
+            value, pk = last[field], last['id']
+        else:
+            value, pk = getattr(last, field), last.pk
+        cursor = self.encode_cursor(self.ordering, value, pk)
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_first_link(self):
+        url = self.request.build_absolute_uri()
+        return remove_query_param(url, self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', None),
+            ('first', self.get_first_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,148 @@
+"""
+Versioned response cache for anonymous act reads.
+
+Every cache key embeds a global act-data version. Any act write bumps the
+version after commit, which orphans every cached response at once, so no
+per-key invalidation bookkeeping is needed; orphaned entries simply expire.
+Only anonymous GETs are served from or stored in the cache.
+
+The version is stored without an expiry and bumped with the cache's atomic
+incr. Should the key still disappear (a cache cull or flush), it is
+re-seeded from the clock rather than from 1, so a new version never
+repeats one whose responses may still be cached.
+"""
+import hashlib
+import threading
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+DATA_VERSION_KEY = 'act_data_version'
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+HITS_KEY = 'act_response_cache_hits'
+MISSES_KEY = 'act_response_cache_misses'
+
+
+def _seed_version():
+    # Milliseconds since the epoch: ahead of any earlier version unless writes
+    # averaged more than one bump per millisecond
+    return time.time_ns() // 1_000_000
+
+
+def data_version():
+    """Return the current act-data version, initializing it on first use"""
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        seed = _seed_version()
+        cache.add(DATA_VERSION_KEY, seed, None)
+        version = cache.get(DATA_VERSION_KEY, seed)
+    return version
+
+
+def _bump():
+    try:
+        cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        if not cache.add(DATA_VERSION_KEY, _seed_version(), None):
+            # Another worker re-seeded it first
+            cache.incr(DATA_VERSION_KEY)
+
+
+def bump_data_version():
+    """Invalidate every cached act response once the current transaction commits"""
+    transaction.on_commit(_bump)
+
+
+# Hits and misses are tallied in-process and folded into the shared counters
+# every COUNTER_FLUSH_EVERY lookups, keeping cache writes off the hot path
+COUNTER_FLUSH_EVERY = 100
+_pending_counts = {HITS_KEY: 0, MISSES_KEY: 0}
+_pending_lock = threading.Lock()
+
+
+def _add_to_counter(key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, None):
+            cache.incr(key, delta)
+
+
+def flush_counters():
+    """Fold this process's pending hit/miss tallies into the shared counters"""
+    with _pending_lock:
+        pending = dict(_pending_counts)
+        for key in _pending_counts:
+            _pending_counts[key] = 0
+    for key, delta in pending.items():
+        if delta:
+            _add_to_counter(key, delta)
+
+
+def _increment(key):
+    with _pending_lock:
+        _pending_counts[key] += 1
+        due = sum(_pending_counts.values()) >= COUNTER_FLUSH_EVERY
+    if due:
+        flush_counters()
+
+
+def response_cache_key(request, name):
+    """Key on the endpoint, origin and sorted query parameters plus the data version"""
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    digest = hashlib.sha1(
+        f'{request.scheme}://{request.get_host()}?{urlencode(params)}'.encode('utf-8')
+    ).hexdigest()
+    return f'act_response:{data_version()}:{name}:{digest}'
+
+
+def cache_anonymous_response(view_method):
+    """Serve anonymous GETs of a viewset method from the versioned cache"""
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+
+        key = response_cache_key(request, view_method.__name__)
+        data = cache.get(key)
+        if data is not None:
+            _increment(HITS_KEY)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _increment(MISSES_KEY)
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
+
+
+def response_cache_stats():
+    """Return hit/miss counters and the current data version"""
+    flush_counters()
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    stats = {
+        'version': data_version(),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
+    # Per-process tier counters when the two-tier backend is configured
+    if hasattr(cache, 'stats'):
+        stats['backend'] = cache.stats()
+    return stats
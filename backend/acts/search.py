@@ -0,0 +1,171 @@
+"""
+Full-text search for acts.
+
+PostgreSQL: ``acts_act.search_vector`` is a stored generated tsvector over
+city/country (weight A), description (B) and submitted_by (C) with a GIN
+index, so the database keeps it in sync on every write, bulk or not.
+
+SQLite (development): ``acts_act_fts`` is an external-content FTS5 table
+kept in sync by insert/delete triggers on ``acts_act`` and an update
+trigger limited to the indexed columns. SQLite table rebuilds during
+migrations drop those triggers, so they are re-installed after every
+``migrate`` (see ActsConfig.ready).
+
+ActSearchFilter matches every search term as a word prefix and orders
+results by relevance unless the client asked for an explicit ordering.
+Other database vendors fall back to DRF's ILIKE search.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+SEARCH_CONFIG = 'simple'
+FTS_TABLE = 'acts_act_fts'
+FTS_TRIGGERS = ('acts_act_fts_ai', 'acts_act_fts_ad', 'acts_act_fts_au')
+FTS_COLUMNS = ('description', 'city', 'country', 'submitted_by')
+
+POSTGRES_INSTALL = [
+    f"""
+    ALTER TABLE acts_act ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(city, '') || ' ' || coalesce(country, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(submitted_by, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS acts_act_search_vector_gin ON acts_act USING GIN (search_vector)",
+]
+POSTGRES_REMOVE = [
+    "DROP INDEX IF EXISTS acts_act_search_vector_gin",
+    "ALTER TABLE acts_act DROP COLUMN IF EXISTS search_vector",
+]
+
+_columns = ', '.join(FTS_COLUMNS)
+_new_values = ', '.join(f'new.{column}' for column in FTS_COLUMNS)
+_old_values = ', '.join(f'old.{column}' for column in FTS_COLUMNS)
+SQLITE_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_columns}, content='acts_act', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+)
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS acts_act_fts_ai AFTER INSERT ON acts_act BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS acts_act_fts_ad AFTER DELETE ON acts_act BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS acts_act_fts_au AFTER UPDATE OF {_columns} ON acts_act BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END
+    """,
+]
+SQLITE_REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+SQLITE_REMOVE = [f"DROP TRIGGER IF EXISTS {trigger}" for trigger in FTS_TRIGGERS] + [
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def install_search_index(connection):
+    """Create the vendor's search structures (idempotent)"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for sql in POSTGRES_INSTALL:
+                cursor.execute(sql)
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+                FTS_TRIGGERS,
+            )
+            triggers_present = cursor.fetchone()[0] == len(FTS_TRIGGERS)
+            cursor.execute(SQLITE_TABLE)
+            for sql in SQLITE_TRIGGERS:
+                cursor.execute(sql)
+            if not triggers_present:
+                # Writes may have happened without triggers, reindex everything
+                cursor.execute(SQLITE_REBUILD)
+
+
+def remove_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for sql in POSTGRES_REMOVE:
+                cursor.execute(sql)
+        elif connection.vendor == 'sqlite':
+            for sql in SQLITE_REMOVE:
+                cursor.execute(sql)
+
+
+def search_index_installed(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT count(*) FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+            return cursor.fetchone()[0] > 0
+    return connection.vendor == 'postgresql'
+
+
+def _terms(search_terms):
+    words = []
+    for term in search_terms:
+        words += re.findall(r'\w+', term, flags=re.UNICODE)
+    return words
+
+
+def full_text_search(queryset, words):
+    """
+    Filter acts matching every word (as a prefix) and annotate search_rank,
+    where a higher rank is a better match.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        # Words are \w+ only, so they cannot carry tsquery operators
+        query = ' & '.join(f'{word}:*' for word in words)
+        tsquery = f"to_tsquery('{SEARCH_CONFIG}', %s)"
+        return queryset.filter(
+            RawSQL(f'acts_act.search_vector @@ {tsquery}', (query,), output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f'ts_rank(acts_act.search_vector, {tsquery})', (query,), output_field=FloatField())
+        )
+
+    query = ' AND '.join(f'"{word}"*' for word in words)
+    return queryset.filter(
+        RawSQL(
+            f'acts_act.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)',
+            (query,),
+            output_field=BooleanField(),
+        )
+    ).annotate(
+        # bm25 is lower-is-better, negate it so both vendors sort descending
+        search_rank=RawSQL(
+            f'(SELECT -bm25({FTS_TABLE}, 2.0, 4.0, 4.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = acts_act.id)',
+            (query,),
+            output_field=FloatField(),
+        )
+    )
+
+
+class ActSearchFilter(SearchFilter):
+    """SearchFilter backed by the full-text index, ranked by relevance"""
+
+    def filter_queryset(self, request, queryset, view):
+        connection = connections[queryset.db]
+        if connection.vendor not in ('postgresql', 'sqlite') or not search_index_installed(connection):
+            return super().filter_queryset(request, queryset, view)
+
+        words = _terms(self.get_search_terms(request))
+        if not words:
+            return queryset
+
+        queryset = full_text_search(queryset, words)
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        return queryset.order_by('-search_rank', '-created_at')
@@ -1,5 +1,27 @@
+import decimal
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 from .models import Act, Category
+from .appreciations import pending_appreciations
+
+
+class ActListSerializer(serializers.ListSerializer):
+    """Looks up buffered appreciations for the whole page in one cache read"""
+    
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        instances = list(iterable)
+        if 'appreciation_count' in self.child.fields:
+            self.child.pending = pending_appreciations(
+                instance.pk for instance in instances if instance.pk is not None
+            )
+        try:
+            return super().to_representation(instances)
+        finally:
+            self.child.pending = None
 
 
 class ActSerializer(serializers.ModelSerializer):
@@ -26,6 +48,18 @@ class ActSerializer(serializers.ModelSerializer):
             'username',
         ]
         read_only_fields = ['id', 'appreciation_count', 'created_at', 'updated_at']
+        list_serializer_class = ActListSerializer
+    
+    # Pending appreciation deltas prefetched by ActListSerializer
+    pending = None
+    
+    def __init__(self, *args, **kwargs):
+        # Optional sparse fieldset, see sparse_fields()
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
     
     def get_username(self, obj):
         """Get username from user if available, otherwise use submitted_by"""
@@ -35,6 +69,14 @@ class ActSerializer(serializers.ModelSerializer):
             return obj.submitted_by
         return 'Anonymous'
     
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Include appreciations that are buffered but not yet flushed
+        if instance.pk is not None and 'appreciation_count' in data:
+            pending = self.pending if self.pending is not None else pending_appreciations([instance.pk])
+            data['appreciation_count'] += pending.get(instance.pk, 0)
+        return data
+    
     def validate_category(self, value):
         """Validate category is one of the allowed choices"""
         valid_categories = [choice[0] for choice in Category.choices]
@@ -42,3 +84,155 @@ class ActSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Category must be one of: {', '.join(valid_categories)}")
         return value
 
+
+
+# Fast read path
+#
+# Builds the exact ActSerializer representation straight from one
+# values() query (joined to the user table for username), skipping
+# model instantiation and per-field DRF serialization. Used by the list
+# endpoints; ActSerializer stays the source of truth for writes, and
+# benchmark_act_serializers checks the two produce identical output.
+
+ACT_READ_COLUMNS = (
+    'id',
+    'description',
+    'category',
+    'latitude',
+    'longitude',
+    'city',
+    'country',
+    'evidence_url',
+    'submitted_by',
+    'is_anonymous',
+    'appreciation_count',
+    'created_at',
+    'updated_at',
+    'user_id',
+    'user__username',
+)
+
+_CATEGORY_LABELS = {value: str(label) for value, label in Category.choices}
+_COORDINATE_FIELD = Act._meta.get_field('latitude')
+_COORDINATE_QUANTUM = decimal.Decimal('.1') ** _COORDINATE_FIELD.decimal_places
+_COORDINATE_CONTEXT = decimal.Context(prec=_COORDINATE_FIELD.max_digits)
+
+
+def _coordinate(value):
+    if not isinstance(value, decimal.Decimal):
+        value = decimal.Decimal(str(value).strip())
+    return '{:f}'.format(value.quantize(_COORDINATE_QUANTUM, context=_COORDINATE_CONTEXT))
+
+
+def _datetime(value, tz):
+    if value is None:
+        return None
+    if tz is not None:
+        value = value.astimezone(tz) if timezone.is_aware(value) else timezone.make_aware(value, tz)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+# Sparse fieldsets (?fields= / ?omit=)
+#
+# Each output field lists the columns it is built from, so a fieldset
+# narrows the values() query (or .only() for model instances) as well as
+# the payload. id is always returned, and the keyset pagination columns
+# are always read since cursors are built from them.
+
+ACT_FIELDS = tuple(ActSerializer.Meta.fields)
+_FIELD_COLUMNS = {
+    'category_display': ('category',),
+    'appreciation_count': ('appreciation_count',),
+    'username': ('user_id', 'user__username', 'submitted_by', 'is_anonymous'),
+}
+_ALWAYS_COLUMNS = ('id', 'created_at', 'appreciation_count')
+
+
+def sparse_fields(query_params):
+    """Return the requested act fields in serializer order, or None for all of them"""
+    requested = query_params.get('fields', '')
+    omitted = query_params.get('omit', '')
+    if not requested and not omitted:
+        return None
+    
+    requested = {name.strip() for name in requested.split(',') if name.strip()} or set(ACT_FIELDS)
+    omitted = {name.strip() for name in omitted.split(',') if name.strip()}
+    unknown = (requested | omitted) - set(ACT_FIELDS)
+    if unknown:
+        raise ValidationError({
+            'fields': f"Unknown fields: {', '.join(sorted(unknown))}. Choose from: {', '.join(ACT_FIELDS)}"
+        })
+    return tuple(name for name in ACT_FIELDS if name == 'id' or (name in requested and name not in omitted))
+
+
+def act_columns(fields=None):
+    """Columns the fast serializer reads for a fieldset"""
+    if fields is None:
+        return ACT_READ_COLUMNS
+    columns = dict.fromkeys(_ALWAYS_COLUMNS)
+    for name in fields:
+        columns.update(dict.fromkeys(_FIELD_COLUMNS.get(name, (name,))))
+    return tuple(columns)
+
+
+def act_only(queryset, fields=None):
+    """Defer every Act column a fieldset does not need (model instance counterpart of act_rows)"""
+    if fields is None:
+        return queryset.select_related('user')
+    columns = ['user' if column == 'user_id' else column for column in act_columns(fields)]
+    if 'user__username' in columns:
+        queryset = queryset.select_related('user')
+    return queryset.only(*columns)
+
+
+def act_rows(queryset, fields=None):
+    """Narrow an Act queryset to the columns the fast serializer needs"""
+    return queryset.values(*act_columns(fields))
+
+
+def _username(row):
+    if row['user_id'] is not None:
+        return row['user__username']
+    if row['submitted_by'] and not row['is_anonymous']:
+        return row['submitted_by']
+    return 'Anonymous'
+
+
+# field -> builder(row, tz, pending)
+_FIELD_BUILDERS = {
+    'id': lambda row, tz, pending: row['id'],
+    'description': lambda row, tz, pending: row['description'],
+    'category': lambda row, tz, pending: row['category'],
+    'category_display': lambda row, tz, pending: _CATEGORY_LABELS.get(row['category'], row['category']),
+    'latitude': lambda row, tz, pending: _coordinate(row['latitude']),
+    'longitude': lambda row, tz, pending: _coordinate(row['longitude']),
+    'city': lambda row, tz, pending: row['city'],
+    'country': lambda row, tz, pending: row['country'],
+    'evidence_url': lambda row, tz, pending: row['evidence_url'],
+    'submitted_by': lambda row, tz, pending: row['submitted_by'],
+    'is_anonymous': lambda row, tz, pending: row['is_anonymous'],
+    'appreciation_count': lambda row, tz, pending: row['appreciation_count'] + pending.get(row['id'], 0),
+    'created_at': lambda row, tz, pending: _datetime(row['created_at'], tz),
+    'updated_at': lambda row, tz, pending: _datetime(row['updated_at'], tz),
+    'username': lambda row, tz, pending: _username(row),
+}
+
+
+def serialize_act_rows(rows, fields=None):
+    """Serialize act_rows() dicts exactly like ActSerializer(many=True, fields=fields).data"""
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    builders = [(name, _FIELD_BUILDERS[name]) for name in (fields or ACT_FIELDS)]
+    rows = list(rows)
+    if fields is None or 'appreciation_count' in fields:
+        pending = pending_appreciations(row['id'] for row in rows)
+    else:
+        pending = {}
+    return [{name: build(row, tz, pending) for name, build in builders} for row in rows]
+
+
+def serialize_acts(queryset, fields=None):
+    """Fetch and serialize acts with a single query"""
+    return serialize_act_rows(act_rows(queryset, fields), fields)
@@ -0,0 +1,151 @@
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.dispatch import receiver, Signal
+from .models import Act, ActTombstone
+from .clustering import add_to_clusters, remove_from_clusters
+from .tiles import invalidate_tiles_for
+from .timeseries import add_daily_count
+from .stats import apply_act_delta, act_day, record_act_created, record_act_deleted, record_appreciations
+from .response_cache import bump_data_version
+from .live import publish_acts
+
+# Sent once per bulk submission (acts=list of saved Act instances) instead of
+# post_save per act, since bulk_create bypasses Act.save and model signals
+acts_bulk_created = Signal()
+
+
+@receiver(post_save, sender=Act)
+def update_cluster_index(sender, instance, created, **kwargs):
+    """Keep the map cluster index in step with created or moved acts"""
+    if created:
+        add_to_clusters(instance.latitude, instance.longitude, instance.category)
+        return
+    
+    previous = (
+        instance.previous_value('latitude'),
+        instance.previous_value('longitude'),
+        instance.previous_value('category'),
+    )
+    current = (instance.latitude, instance.longitude, instance.category)
+    if None in previous or previous == current:
+        return
+    
+    remove_from_clusters(*previous)
+    add_to_clusters(*current)
+
+
+@receiver(post_delete, sender=Act)
+def remove_from_cluster_index(sender, instance, **kwargs):
+    """Drop a deleted act from the map cluster index"""
+    remove_from_clusters(instance.latitude, instance.longitude, instance.category)
+
+
+@receiver(post_save, sender=Act)
+def invalidate_map_tiles(sender, instance, created, **kwargs):
+    """Evict cached tiles that contain a created, moved or recategorised act"""
+    previous = (
+        instance.previous_value('latitude'),
+        instance.previous_value('longitude'),
+        instance.previous_value('category'),
+    )
+    current = (instance.latitude, instance.longitude, instance.category)
+    if not created and previous == current:
+        return
+    
+    def invalidate():
+        invalidate_tiles_for(*current[:2])
+        if not created and None not in previous:
+            invalidate_tiles_for(*previous[:2])
+    
+    # Evict after commit so a concurrent reader cannot re-cache the old tile
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_delete, sender=Act)
+def invalidate_deleted_act_tiles(sender, instance, **kwargs):
+    """Evict cached tiles that contained a deleted act"""
+    lat, lng = instance.latitude, instance.longitude
+    transaction.on_commit(lambda: invalidate_tiles_for(lat, lng))
+
+
+@receiver(post_save, sender=Act)
+def update_stats_rollup(sender, instance, created, **kwargs):
+    """Keep the global stats rollup in step with act writes"""
+    if created:
+        record_act_created(instance)
+        return
+    
+    update_fields = kwargs.get('update_fields')
+    previous_appreciations = instance.previous_value('appreciation_count')
+    if update_fields and 'appreciation_count' in update_fields and previous_appreciations is not None:
+        record_appreciations(instance.appreciation_count - previous_appreciations)
+    
+    previous = tuple(instance.previous_value(field) for field in ('city', 'country', 'category'))
+    current = (instance.city, instance.country, instance.category)
+    if None in previous or previous == current:
+        return
+    
+    day = act_day(instance)
+    apply_act_delta(*previous, day, -1)
+    apply_act_delta(*current, day, 1)
+
+
+@receiver(post_delete, sender=Act)
+def remove_from_stats_rollup(sender, instance, **kwargs):
+    """Drop a deleted act from the global stats rollup"""
+    record_act_deleted(instance)
+
+
+@receiver(post_save, sender=Act)
+def update_daily_counts(sender, instance, created, **kwargs):
+    """Keep the daily time-series rollup in step with act writes"""
+    current = (instance.category, instance.country, instance.city)
+    day = act_day(instance)
+    if created:
+        add_daily_count(day, *current, 1)
+        return
+    
+    previous = tuple(instance.previous_value(field) for field in ('category', 'country', 'city'))
+    if None in previous or previous == current:
+        return
+    
+    add_daily_count(day, *previous, -1)
+    add_daily_count(day, *current, 1)
+
+
+@receiver(post_delete, sender=Act)
+def remove_from_daily_counts(sender, instance, **kwargs):
+    """Drop a deleted act from the daily time-series rollup"""
+    add_daily_count(act_day(instance), instance.category, instance.country, instance.city, -1)
+
+
+@receiver(post_save, sender=Act)
+@receiver(post_delete, sender=Act)
+def invalidate_response_cache(sender, instance, **kwargs):
+    """Orphan every cached act response after any act write"""
+    bump_data_version()
+
+
+@receiver(acts_bulk_created)
+def invalidate_response_cache_bulk(sender, acts, **kwargs):
+    """Orphan every cached act response after a bulk submission"""
+    bump_data_version()
+
+
+@receiver(post_delete, sender=Act)
+def record_tombstone(sender, instance, **kwargs):
+    """Leave a tombstone so delta sync clients learn about the delete"""
+    ActTombstone.objects.create(act_id=instance.pk)
+
+
+@receiver(post_save, sender=Act)
+def publish_live_act(sender, instance, created, **kwargs):
+    """Push a newly created act to live feed subscribers once it is committed"""
+    if created:
+        transaction.on_commit(lambda: publish_acts([instance]))
+
+
+@receiver(acts_bulk_created)
+def publish_live_acts_bulk(sender, acts, **kwargs):
+    """Push a bulk submission to live feed subscribers once it is committed"""
+    transaction.on_commit(lambda: publish_acts(acts))
@@ -0,0 +1,187 @@
+"""
+Spatial grid helpers for Act proximity queries.
+
+The globe is split into fixed GRID_CELL_DEGREES x GRID_CELL_DEGREES cells
+numbered row-major from the south-west corner, so every row of cells inside
+a bounding box is one contiguous range of ids. A bounding box lookup is
+therefore a handful of index range scans on ``Act.grid_cell`` (one per
+row) instead of a scan over a whole latitude band. Boxes taller than
+MAX_COVERING_ROWS rows fall back to one range over their whole band, so
+the query stays a bounded size however large the box is.
+"""
+import math
+
+from django.db.models import ExpressionWrapper, F, FloatField, Q
+from django.db.models.functions import Cast
+
+GRID_CELL_DEGREES = 0.05
+GRID_ROWS = int(round(180 / GRID_CELL_DEGREES))
+GRID_COLUMNS = int(round(360 / GRID_CELL_DEGREES))
+MAX_COVERING_ROWS = 64
+
+
+def _row(lat):
+    row = int(math.floor((float(lat) + 90) / GRID_CELL_DEGREES))
+    return min(GRID_ROWS - 1, max(0, row))
+
+
+def _column(lng):
+    column = int(math.floor((float(lng) + 180) / GRID_CELL_DEGREES))
+    return min(GRID_COLUMNS - 1, max(0, column))
+
+
+def grid_cell_for(lat, lng):
+    """Return the grid cell id containing the given coordinate"""
+    if lat is None or lng is None:
+        return None
+    return _row(lat) * GRID_COLUMNS + _column(lng)
+
+
+def _longitude_spans(min_lng, max_lng):
+    """Split a longitude range into spans that do not cross the antimeridian"""
+    if max_lng - min_lng >= 360:
+        return [(-180, 180)]
+    if min_lng < -180:
+        return [(min_lng + 360, 180), (-180, max_lng)]
+    if max_lng > 180:
+        return [(min_lng, 180), (-180, max_lng - 360)]
+    return [(min_lng, max_lng)]
+
+
+def covering_cells_q(min_lat, max_lat, min_lng, max_lng):
+    """Build a Q matching every grid cell that overlaps the bounding box"""
+    first_row, last_row = _row(min_lat), _row(max_lat)
+    if last_row - first_row >= MAX_COVERING_ROWS:
+        # One range per row would make the query too large; cover whole rows
+        return Q(grid_cell__range=(first_row * GRID_COLUMNS, (last_row + 1) * GRID_COLUMNS - 1))
+    query = Q()
+    for row in range(first_row, last_row + 1):
+        base = row * GRID_COLUMNS
+        for span_min, span_max in _longitude_spans(min_lng, max_lng):
+            query |= Q(grid_cell__range=(base + _column(span_min), base + _column(span_max)))
+    return query
+
+
+def filter_bbox(queryset, min_lat, max_lat, min_lng, max_lng):
+    """
+    Restrict a queryset of acts to a bounding box.
+
+    The grid cell ranges do the coarse, indexed narrowing; the exact
+    coordinate check then trims acts in the edge cells that fall outside.
+    Raises ValueError for a non-finite bound.
+    """
+    bounds = [float(value) for value in (min_lat, max_lat, min_lng, max_lng)]
+    if not all(math.isfinite(value) for value in bounds):
+        raise ValueError('Bounding box must be finite')
+    min_lat, max_lat, min_lng, max_lng = bounds
+    min_lat = max(-90.0, min_lat)
+    max_lat = min(90.0, max_lat)
+
+    longitude_q = Q()
+    for span_min, span_max in _longitude_spans(min_lng, max_lng):
+        longitude_q |= Q(longitude__range=(span_min, span_max))
+
+    return queryset.filter(
+        covering_cells_q(min_lat, max_lat, min_lng, max_lng),
+        longitude_q,
+        latitude__range=(min_lat, max_lat),
+    )
+
+
+# Web Mercator (slippy map) tile math shared by clustering and tiles
+
+MAX_MERCATOR_LATITUDE = 85.05112878
+
+
+def tile_fraction(lat, lng, zoom):
+    """Return fractional slippy-map tile coordinates for a point at a zoom level"""
+    lat = min(MAX_MERCATOR_LATITUDE, max(-MAX_MERCATOR_LATITUDE, float(lat)))
+    n = 2 ** zoom
+    x = (float(lng) + 180.0) / 360.0 * n
+    lat_rad = math.radians(lat)
+    y = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    return min(n - 1e-9, max(0.0, x)), min(n - 1e-9, max(0.0, y))
+
+
+def tile_for(lat, lng, zoom):
+    """Return the integer (x, y) tile containing a point at a zoom level"""
+    x, y = tile_fraction(lat, lng, zoom)
+    return int(x), int(y)
+
+
+def tile_bounds(zoom, x, y):
+    """Return (min_lat, max_lat, min_lng, max_lng) covered by a tile"""
+    n = 2 ** zoom
+
+    def lat_at(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return lat_at(y + 1), lat_at(y), x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+
+
+# Great-circle distance and k-nearest search
+
+EARTH_RADIUS_M = 6371008.8
+METRES_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+INITIAL_SEARCH_RADIUS_M = 1000
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in metres"""
+    lat1, lng1, lat2, lng2 = (math.radians(float(value)) for value in (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bbox_around(lat, lng, radius_m):
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing a circle"""
+    lat_delta = radius_m / METRES_PER_DEGREE
+    max_abs_lat = min(90.0, abs(lat) + lat_delta)
+    cos_lat = math.cos(math.radians(max_abs_lat))
+    if cos_lat < 1e-6:
+        lng_delta = 180.0
+    else:
+        lng_delta = min(180.0, lat_delta / cos_lat)
+    return lat - lat_delta, lat + lat_delta, lng - lng_delta, lng + lng_delta
+
+
+def nearest(queryset, lat, lng, radius_m, k):
+    """
+    Return up to ``k`` (distance_m, pk) pairs within ``radius_m`` of a point,
+    closest first.
+
+    The search box starts small and grows fourfold until it holds ``k``
+    matches or reaches ``radius_m``. Each round is a grid-cell bounded
+    query that lets the database order by an equirectangular distance and
+    return only ``k`` (pk, latitude, longitude) rows, which are then ranked
+    by great-circle distance.
+    """
+    cos_lat = math.cos(math.radians(lat))
+    approx_distance = ExpressionWrapper(
+        (Cast(F('latitude'), FloatField()) - lat) * (Cast(F('latitude'), FloatField()) - lat)
+        + (Cast(F('longitude'), FloatField()) - lng) * (Cast(F('longitude'), FloatField()) - lng)
+        * (cos_lat * cos_lat),
+        output_field=FloatField(),
+    )
+
+    search_radius = min(radius_m, INITIAL_SEARCH_RADIUS_M)
+    while True:
+        candidates = (
+            filter_bbox(queryset, *bbox_around(lat, lng, search_radius))
+            .annotate(approx_distance=approx_distance)
+            .order_by('approx_distance')
+            .values_list('pk', 'latitude', 'longitude')[:k]
+        )
+        matches = []
+        for pk, match_lat, match_lng in candidates:
+            distance = haversine_m(lat, lng, match_lat, match_lng)
+            if distance <= search_radius:
+                matches.append((distance, pk))
+
+        if len(matches) >= k or search_radius >= radius_m:
+            matches.sort()
+            return matches
+        search_radius = min(radius_m, search_radius * 4)
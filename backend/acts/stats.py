@@ -0,0 +1,220 @@
+"""
+Incrementally maintained global statistics.
+
+ActStatsCounter holds one row per city, country, category and day, and
+ActStats is a single row of running totals. Both are updated inside the Act
+write's transaction with F() expressions, so writers never read-modify-write
+the shared ActStats row and only ever wait on the counter rows they touch.
+City and country counters are keyed by ``location_key`` (case-folded), the
+same key the region lookups use. ``rebuild_stats`` recomputes everything
+from the Act table.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .counters import bulk_increment
+from .models import Act, ActStats, ActStatsCounter, City, location_key
+
+
+def _update_stats(**deltas):
+    """Add deltas to the ActStats row in one UPDATE, creating the row on first use"""
+    values = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not values:
+        return
+    if not ActStats.objects.filter(pk=1).update(**values):
+        ActStats.objects.get_or_create(pk=1)
+        ActStats.objects.filter(pk=1).update(**values)
+
+
+def _counter_keys(city, country, category, day):
+    keys = [(ActStatsCounter.KIND_CATEGORY, category), (ActStatsCounter.KIND_DAY, day.isoformat())]
+    if location_key(city):
+        keys.append((ActStatsCounter.KIND_CITY, location_key(city)))
+    if location_key(country):
+        keys.append((ActStatsCounter.KIND_COUNTRY, location_key(country)))
+    return keys
+
+
+def _distinct_location_deltas(deltas, counts):
+    """
+    Changes to total_cities/total_countries implied by applying ``deltas`` to
+    city and country counters that now hold ``counts``. The counter rows stay
+    locked by our UPDATE until commit, so a counter that now equals its delta
+    was zero before.
+    """
+    changes = {'total_cities': 0, 'total_countries': 0}
+    fields = {ActStatsCounter.KIND_CITY: 'total_cities', ActStatsCounter.KIND_COUNTRY: 'total_countries'}
+    for (kind, key), delta in deltas.items():
+        if kind not in fields:
+            continue
+        count = counts[(kind, key)]
+        if delta > 0 and count == delta:
+            changes[fields[kind]] += 1
+        elif delta < 0 and count == 0:
+            changes[fields[kind]] -= 1
+    return changes
+
+
+def act_day(act):
+    """Calendar day an act counts towards, matching created_at__date lookups"""
+    created_at = act.created_at or timezone.now()
+    if timezone.is_aware(created_at):
+        return timezone.localdate(created_at)
+    return created_at.date()
+
+
+@transaction.atomic
+def apply_act_delta(city, country, category, day, delta, appreciations=0):
+    """
+    Add (delta=1) or remove (delta=-1) one act with the given attributes,
+    and adjust total appreciations by ``appreciations``.
+    """
+    changes = {}
+    if delta:
+        keys = _counter_keys(city, country, category, day)
+        keys_q = Q()
+        for kind, key in keys:
+            keys_q |= Q(kind=kind, key=key)
+
+        ActStatsCounter.objects.bulk_create(
+            [ActStatsCounter(kind=kind, key=key) for kind, key in keys],
+            ignore_conflicts=True,
+        )
+        ActStatsCounter.objects.filter(keys_q).update(count=F('count') + delta)
+        counts = {
+            (kind, key): count
+            for kind, key, count in ActStatsCounter.objects.filter(
+                keys_q, kind__in=[ActStatsCounter.KIND_CITY, ActStatsCounter.KIND_COUNTRY]
+            ).values_list('kind', 'key', 'count')
+        }
+        changes = _distinct_location_deltas({key: delta for key in keys}, counts)
+
+    _update_stats(total_acts=delta, total_appreciations=appreciations, **changes)
+
+
+def record_act_created(act):
+    apply_act_delta(act.city, act.country, act.category, act_day(act), 1, act.appreciation_count)
+
+
+@transaction.atomic
+def record_acts_created(acts):
+    """Add a batch of new acts to the rollup with a fixed number of queries"""
+    if not acts:
+        return
+
+    deltas = {}
+    for act in acts:
+        for key in _counter_keys(act.city, act.country, act.category, act_day(act)):
+            deltas[key] = deltas.get(key, 0) + 1
+    bulk_increment(ActStatsCounter, {
+        (('kind', kind), ('key', key)): {'count': delta} for (kind, key), delta in deltas.items()
+    })
+
+    locations_q = Q()
+    for kind, key in deltas:
+        if kind in (ActStatsCounter.KIND_CITY, ActStatsCounter.KIND_COUNTRY):
+            locations_q |= Q(kind=kind, key=key)
+    counts = {}
+    if locations_q:
+        counts = {
+            (kind, key): count
+            for kind, key, count in ActStatsCounter.objects.filter(locations_q).values_list('kind', 'key', 'count')
+        }
+
+    _update_stats(
+        total_acts=len(acts),
+        total_appreciations=sum(act.appreciation_count for act in acts),
+        **_distinct_location_deltas(deltas, counts),
+    )
+
+
+def record_act_deleted(act):
+    apply_act_delta(act.city, act.country, act.category, act_day(act), -1, -act.appreciation_count)
+
+
+def record_appreciations(delta):
+    """Adjust total appreciations after counters were changed outside Act.save"""
+    if delta:
+        _update_stats(total_appreciations=delta)
+
+
+def _top_city():
+    """(display name, count) of the city with the most acts"""
+    top = (
+        ActStatsCounter.objects.filter(kind=ActStatsCounter.KIND_CITY, count__gt=0)
+        .order_by('-count')
+        .annotate(name=Subquery(City.objects.filter(name_key=OuterRef('key')).values('name')[:1]))
+        .values_list('name', 'key', 'count')
+        .first()
+    )
+    if top is None:
+        return None, 0
+    name, key, count = top
+    return name or key, count
+
+
+def get_stats():
+    """Read the rollup in the shape returned by /api/acts/stats/"""
+    stats = ActStats.objects.filter(pk=1).first() or ActStats()
+    today = timezone.localdate().isoformat()
+    counters = ActStatsCounter.objects.filter(
+        Q(kind=ActStatsCounter.KIND_CATEGORY, count__gt=0) | Q(kind=ActStatsCounter.KIND_DAY, key=today)
+    ).values_list('kind', 'key', 'count')
+    category_breakdown = {}
+    acts_today = 0
+    for kind, key, count in counters:
+        if kind == ActStatsCounter.KIND_DAY:
+            acts_today = count
+        else:
+            category_breakdown[key] = count
+    top_city, top_city_count = _top_city()
+    return {
+        'total_acts': stats.total_acts,
+        'acts_today': acts_today,
+        'active_regions': stats.total_cities,
+        'total_cities': stats.total_cities,
+        'top_region': {
+            'city': top_city,
+            'count': top_city_count,
+        },
+        'category_breakdown': dict(
+            sorted(category_breakdown.items(), key=lambda item: -item[1])
+        ),
+        'total_countries': stats.total_countries,
+        'total_appreciations': stats.total_appreciations,
+    }
+
+
+@transaction.atomic
+def rebuild_stats():
+    """Recompute the counters and the rollup row from the Act table"""
+    ActStats.objects.get_or_create(pk=1)
+    # Hold the row so concurrent writers wait for the rebuild to finish
+    stats = ActStats.objects.select_for_update().get(pk=1)
+    ActStatsCounter.objects.all().delete()
+
+    counts = {}
+    for kind, field in ((ActStatsCounter.KIND_CITY, 'city'), (ActStatsCounter.KIND_COUNTRY, 'country')):
+        for name, count in Act.objects.exclude(**{field: ''}).values_list(field).annotate(count=Count('id')):
+            key = location_key(name)
+            if key:
+                counts[(kind, key)] = counts.get((kind, key), 0) + count
+    for category, count in Act.objects.values_list('category').annotate(count=Count('id')):
+        counts[(ActStatsCounter.KIND_CATEGORY, category)] = count
+    day_rows = Act.objects.annotate(day=TruncDate('created_at')).values_list('day').annotate(count=Count('id'))
+    for day, count in day_rows:
+        counts[(ActStatsCounter.KIND_DAY, day.isoformat())] = count
+
+    ActStatsCounter.objects.bulk_create(
+        [ActStatsCounter(kind=kind, key=key, count=count) for (kind, key), count in counts.items()],
+        batch_size=1000,
+    )
+
+    stats.total_acts = Act.objects.count()
+    stats.total_appreciations = Act.objects.aggregate(Sum('appreciation_count'))['appreciation_count__sum'] or 0
+    stats.total_cities = sum(1 for kind, _ in counts if kind == ActStatsCounter.KIND_CITY)
+    stats.total_countries = sum(1 for kind, _ in counts if kind == ActStatsCounter.KIND_COUNTRY)
+    stats.save()
+    return stats
@@ -1,3 +1,388 @@
-from django.test import TestCase
+import asyncio
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from santa_project.asgi import application
+
+from .appreciations import appreciate, flush, live_appreciation_count, pending_appreciations
+from .changes import get_changes
+from .live import LIVE_QUEUE_SIZE, feed
+from .models import Act
+from .pagination import ActKeysetPagination
+from .serializers import ActSerializer, serialize_acts
+from .spatial import METRES_PER_DEGREE, nearest
+from .stats import get_stats, rebuild_stats
+
+
+def _event(pk, category='food', latitude=0.0, longitude=0.0):
+    return {
+        'id': pk,
+        'category': category,
+        'latitude': latitude,
+        'longitude': longitude,
+        'data': json.dumps({'id': pk}),
+    }
+
+
+class LiveActsTests(SimpleTestCase):
+    """Drive /api/acts/live/ through the ASGI app with in-memory receive/send channels"""
+
+    def setUp(self):
+        self.assertEqual(feed.subscriber_count(), 0)
+
+    async def connect(self, query=''):
+        """Open a live connection; returns (task, incoming, outgoing, response start message)"""
+        incoming = asyncio.Queue()
+        incoming.put_nowait({'type': 'http.request', 'body': b'', 'more_body': False})
+        # One slot, so the stream only advances as fast as the test reads it
+        outgoing = asyncio.Queue(maxsize=1)
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': '/api/acts/live/',
+            'raw_path': b'/api/acts/live/',
+            'query_string': query.encode(),
+            'headers': [(b'host', b'testserver')],
+            'client': ('127.0.0.1', 50000),
+            'server': ('testserver', 80),
+        }
+        task = asyncio.ensure_future(application(scope, incoming.get, outgoing.put))
+        start = await asyncio.wait_for(outgoing.get(), 5)
+        return task, incoming, outgoing, start
+
+    async def disconnect(self, task, incoming, outgoing):
+        incoming.put_nowait({'type': 'http.disconnect'})
+        deadline = asyncio.get_running_loop().time() + 5
+        while not task.done():
+            self.assertLess(asyncio.get_running_loop().time(), deadline, 'Stream kept running after disconnect')
+            # Drain anything the stream is still trying to send
+            try:
+                await asyncio.wait_for(outgoing.get(), 0.05)
+            except asyncio.TimeoutError:
+                pass
+        await task
+
+    async def next_frame(self, outgoing):
+        """Next SSE frame other than retry/keepalive, as (event, data)"""
+        while True:
+            message = await asyncio.wait_for(outgoing.get(), 5)
+            frame = message.get('body', b'').decode()
+            if not frame or frame.startswith(('retry:', ':')):
+                continue
+            fields = dict(line.split(': ', 1) for line in frame.strip().split('\n'))
+            return fields['event'], json.loads(fields['data'])
+
+    async def test_category_filter(self):
+        task, incoming, outgoing, start = await self.connect('category=time')
+        self.assertEqual(start['status'], 200)
+        feed.publish(_event(1, category='food'))
+        feed.publish(_event(2, category='time'))
+        self.assertEqual(await self.next_frame(outgoing), ('act', {'id': 2}))
+        await self.disconnect(task, incoming, outgoing)
+
+    async def test_bbox_filter(self):
+        task, incoming, outgoing, start = await self.connect('bbox=0,0,10,10')
+        feed.publish(_event(1, latitude=20.0, longitude=20.0))
+        feed.publish(_event(2, latitude=5.0, longitude=5.0))
+        self.assertEqual(await self.next_frame(outgoing), ('act', {'id': 2}))
+        await self.disconnect(task, incoming, outgoing)
+
+    async def test_bbox_across_antimeridian(self):
+        task, incoming, outgoing, start = await self.connect('bbox=170,-10,-170,10')
+        feed.publish(_event(1, longitude=0.0))
+        feed.publish(_event(2, longitude=-175.0))
+        self.assertEqual(await self.next_frame(outgoing), ('act', {'id': 2}))
+        await self.disconnect(task, incoming, outgoing)
+
+    async def test_invalid_filters(self):
+        for query in ('category=nope', 'bbox=1,2,3'):
+            task, incoming, outgoing, start = await self.connect(query)
+            self.assertEqual(start['status'], 400)
+            await task
+        self.assertEqual(feed.subscriber_count(), 0)
+
+    async def test_queue_overflow(self):
+        task, incoming, outgoing, start = await self.connect()
+        # The test is not reading, so the subscription's queue fills up
+        for pk in range(1, LIVE_QUEUE_SIZE + 11):
+            feed.publish(_event(pk))
+        await asyncio.sleep(0.05)
+
+        received = []
+        while True:
+            event, data = await self.next_frame(outgoing)
+            if event == 'overflow':
+                break
+            received.append(data['id'])
+        # Everything that fit was delivered in order; the rest was dropped
+        self.assertEqual(received, list(range(1, len(received) + 1)))
+        self.assertLess(len(received), LIVE_QUEUE_SIZE + 10)
+        await self.disconnect(task, incoming, outgoing)
+
+    async def test_subscriber_cap(self):
+        held = [feed.subscribe() for _ in range(feed.max_subscribers)]
+        try:
+            self.assertNotIn(None, held)
+            task, incoming, outgoing, start = await self.connect()
+            self.assertEqual(start['status'], 503)
+            self.assertIn((b'Retry-After', b'10'), start['headers'])
+            await task
+        finally:
+            for subscription in held:
+                feed.unsubscribe(subscription)
+
+    async def test_unsubscribe_on_disconnect(self):
+        task, incoming, outgoing, start = await self.connect()
+        self.assertEqual(feed.subscriber_count(), 1)
+        await self.disconnect(task, incoming, outgoing)
+        self.assertEqual(feed.subscriber_count(), 0)
+
+
+class ActTestCase(TestCase):
+    """Starts every test with an empty cache (pending appreciations, cached responses)"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def create_act(self, **kwargs):
+        kwargs.setdefault('description', 'Shovelled a neighbour\'s driveway')
+        kwargs.setdefault('category', 'time')
+        kwargs.setdefault('latitude', 59.9139)
+        kwargs.setdefault('longitude', 10.7522)
+        return Act.objects.create(**kwargs)
+
+
+class FastSerializerTests(ActTestCase):
+    """serialize_acts must render byte-for-byte what ActSerializer renders"""
+
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create_user('elf')
+        self.create_act(user=user, evidence_url='https://example.com/a.jpg')
+        self.create_act(submitted_by='Anonymous Elf', is_anonymous=True, evidence_url=None)
+        self.create_act(submitted_by='Named Elf', is_anonymous=False, evidence_url='')
+        self.create_act(
+            description='Gave ☃ cocoa to the Łódź choir — “danke”',
+            city='Zürich', country='Schweiz', latitude=-33.868820, longitude=-151.209296,
+        )
+        appreciated = self.create_act(category='money', latitude=0, longitude=0)
+        # Buffered (unflushed) appreciations are part of the count on both paths
+        appreciate(appreciated, user)
+
+    def assertSameJSON(self, fields=None):
+        queryset = Act.objects.order_by('id')
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(serialize_acts(queryset, fields)),
+            renderer.render(ActSerializer(queryset, many=True, fields=fields).data),
+        )
+
+    def test_all_fields(self):
+        self.assertSameJSON()
+
+    def test_sparse_fieldsets(self):
+        for fields in (
+            ('id',),
+            ('id', 'username'),
+            ('id', 'category_display', 'appreciation_count'),
+            ('id', 'latitude', 'longitude', 'created_at', 'updated_at'),
+            ('id', 'evidence_url', 'submitted_by', 'is_anonymous'),
+        ):
+            with self.subTest(fields=fields):
+                self.assertSameJSON(fields)
+
+
+class NearbyActsTests(ActTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Acts due north of the origin at known distances (metres)
+        self.acts = [
+            self.create_act(latitude=round(distance / METRES_PER_DEGREE, 6), longitude=0)
+            for distance in (500, 100, 900, 300, 700)
+        ]
+
+    def test_nearest_first(self):
+        matches = nearest(Act.objects.all(), 0.0, 0.0, 1000, 3)
+        self.assertEqual([pk for _, pk in matches], [self.acts[1].pk, self.acts[3].pk, self.acts[0].pk])
+        distances = [distance for distance, _ in matches]
+        self.assertEqual(distances, sorted(distances))
+        self.assertAlmostEqual(distances[0], 100, delta=1)
+
+    def test_radius_limits_matches(self):
+        matches = nearest(Act.objects.all(), 0.0, 0.0, 400, 10)
+        self.assertEqual({pk for _, pk in matches}, {self.acts[1].pk, self.acts[3].pk})
+
+    def test_endpoint(self):
+        response = self.client.get('/api/acts/nearby_acts/', {'lat': 0, 'lng': 0, 'radius_m': 1000, 'k': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([act['id'] for act in response.data['acts']], [self.acts[1].pk, self.acts[3].pk])
+        self.assertLessEqual(response.data['acts'][0]['distance_m'], response.data['acts'][1]['distance_m'])
+
+    def test_non_finite_input_rejected(self):
+        for params in ({'lat': 'nan', 'lng': 0}, {'lat': 0, 'lng': 'inf'}, {'lat': 0, 'lng': 0, 'radius_m': 'nan'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/acts/nearby_acts/', params).status_code, 400)
+        for params in ({'lat': 'inf', 'lng': 0}, {'lat': '1e308', 'lng': 0}, {'lat': 'nan', 'lng': 0}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/acts/region/', params).status_code, 400)
+
+
+class KeysetPaginationTests(ActTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.acts = [self.create_act() for _ in range(7)]
+        # Ties on appreciation_count must be broken by id
+        for index, act in enumerate(self.acts):
+            Act.objects.filter(pk=act.pk).update(appreciation_count=index % 3)
+
+    def walk(self, **params):
+        ids = []
+        url = '/api/acts/'
+        params = {'pagination': 'cursor', **params}
+        with mock.patch.object(ActKeysetPagination, 'page_size', 3):
+            while url:
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                ids += [act['id'] for act in response.data['results']]
+                url, params = response.data['next'], None
+        return ids
+
+    def test_newest_first(self):
+        expected = list(Act.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self.walk(), expected)
+
+    def test_ordering_with_ties(self):
+        expected = list(Act.objects.order_by('appreciation_count', 'id').values_list('id', flat=True))
+        self.assertEqual(self.walk(ordering='appreciation_count'), expected)
+        self.assertEqual(self.walk(ordering='-appreciation_count'), expected[::-1])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/acts/', {'pagination': 'cursor', 'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class StatsRollupTests(ActTestCase):
+
+    def test_incremental_matches_rebuild(self):
+        self.create_act(city='Oslo', country='Norway')
+        self.create_act(city='OSLO', country='norway', category='food')
+        self.create_act(city='Bergen', country='Norway')
+        deleted = self.create_act(city='Tromsø', country='Norway', category='money')
+        self.create_act(city='', country='')
+        deleted.delete()
+
+        stats = get_stats()
+        self.assertEqual(stats['total_acts'], 4)
+        self.assertEqual(stats['total_cities'], 2)
+        self.assertEqual(stats['total_countries'], 1)
+        self.assertEqual(stats['top_region']['count'], 2)
+        self.assertEqual(stats['category_breakdown'], {'time': 3, 'food': 1})
+
+        rebuild_stats()
+        self.assertEqual(get_stats(), stats)
+
+
+class ChangesTests(ActTestCase):
+
+    def sync(self, token, page_size):
+        """Follow a sync to the end; returns (changed ids, deleted ids, pages, last token)"""
+        changed, deleted, pages = [], [], 0
+        while True:
+            result = get_changes(token, page_size=page_size)
+            changed += [act['id'] for act in result['changed']]
+            deleted += result['deleted']
+            pages += 1
+            token = result['next']
+            if not result['has_more']:
+                return changed, deleted, pages, token
+
+    def test_paged_initial_sync(self):
+        acts = [self.create_act() for _ in range(7)]
+        changed, deleted, pages, _ = self.sync(None, page_size=3)
+        self.assertEqual(changed, [act.pk for act in acts])
+        self.assertEqual(deleted, [])
+        self.assertEqual(pages, 3)
+
+    def test_initial_sync_skips_tombstones(self):
+        kept = self.create_act()
+        self.create_act().delete()
+        changed, deleted, _, _ = self.sync(None, page_size=3)
+        self.assertEqual(changed, [kept.pk])
+        self.assertEqual(deleted, [])
+
+    def test_tombstones_are_paged(self):
+        acts = [self.create_act() for _ in range(8)]
+        # Everything so far is already synced
+        with mock.patch('acts.changes.CHANGES_SETTLE_SECONDS', 0):
+            token = get_changes(None)['next']
+        deleted_ids = [act.pk for act in acts[:7]]
+        for act in acts[:7]:
+            act.delete()
+        edited = acts[7]
+        edited.description = 'Edited'
+        edited.save()
+
+        changed, deleted, pages, _ = self.sync(token, page_size=3)
+        self.assertEqual(sorted(set(deleted)), deleted_ids)
+        self.assertIn(edited.pk, changed)
+        self.assertGreaterEqual(pages, 3)
+
+
+class ExportTests(ActTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.act = self.create_act()
+
+    def export(self, **kwargs):
+        response = self.client.get('/api/acts/export/', HTTP_ACCEPT_ENCODING='identity', **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_by_default(self):
+        response, body = self.export()
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertTrue(body.startswith('id,'))
+
+    def test_format_from_query_or_accept_header(self):
+        for kwargs in ({'data': {'format': 'ndjson'}}, {'HTTP_ACCEPT': 'application/x-ndjson'}):
+            with self.subTest(**kwargs):
+                response, body = self.export(**kwargs)
+                self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+                self.assertEqual(json.loads(body.splitlines()[0])['id'], self.act.pk)
+
+
+class AppreciationFlushTests(ActTestCase):
+
+    def test_appreciation_during_flush_is_kept(self):
+        act = self.create_act()
+        users = [User.objects.create_user(f'elf{index}') for index in range(3)]
+        appreciate(act, users[0])
+        appreciate(act, users[1])
+
+        # The third appreciation's row is written while the flush commits,
+        # but its cache increment only lands after the flush updated the cache
+        increments = []
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(flush(), 2)
+            with mock.patch.object(cache, 'incr', side_effect=lambda *args, **kwargs: increments.append(args)):
+                appreciate(act, users[2])
+        for args in increments:
+            cache.incr(*args)
+
+        act.refresh_from_db()
+        self.assertEqual(act.appreciation_count, 2)
+        self.assertEqual(pending_appreciations([act.pk]), {act.pk: 1})
+        self.assertEqual(live_appreciation_count(act), 3)
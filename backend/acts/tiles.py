@@ -0,0 +1,84 @@
+"""
+Compact binary map tiles of act points.
+
+A tile is a little-endian byte string::
+
+    header  b'KAT1', zoom (uint8), x (uint32), y (uint32), count (uint32)
+    points  count x [id (uint32), qx (uint16), qy (uint16), category (uint8)]
+
+``qx``/``qy`` are the point's position inside the tile quantized to
+0..65535 (Web Mercator, origin at the north-west corner) and ``category``
+is the index of the act's category in ``Category.values``. Nine bytes per
+act instead of a full ActSerializer row.
+
+Encoded tiles are cached per (z, x, y) and only the tiles that contain a
+created, moved or deleted act are evicted.
+"""
+import struct
+
+from django.core.cache import cache
+
+from .models import Act, Category
+from .spatial import filter_bbox, tile_bounds, tile_for, tile_fraction
+
+MIN_TILE_ZOOM = 6
+MAX_TILE_ZOOM = 18
+TILE_CACHE_TIMEOUT = 60 * 60 * 24
+TILE_MAGIC = b'KAT1'
+
+HEADER = struct.Struct('<4sBIII')
+POINT = struct.Struct('<IHHB')
+QUANTIZE = 65535
+CATEGORY_CODES = {value: index for index, value in enumerate(Category.values)}
+
+
+def tile_cache_key(zoom, x, y):
+    return f'act_tile:{zoom}:{x}:{y}'
+
+
+def encode_tile(zoom, x, y):
+    """Build the packed point payload for one tile"""
+    min_lat, max_lat, min_lng, max_lng = tile_bounds(zoom, x, y)
+    rows = (
+        filter_bbox(Act.objects.all(), min_lat, max_lat, min_lng, max_lng)
+        .order_by('id')
+        .values_list('id', 'latitude', 'longitude', 'category')
+    )
+
+    points = bytearray()
+    count = 0
+    for act_id, lat, lng, category in rows:
+        fx, fy = tile_fraction(lat, lng, zoom)
+        qx = min(QUANTIZE, max(0, round((fx - x) * QUANTIZE)))
+        qy = min(QUANTIZE, max(0, round((fy - y) * QUANTIZE)))
+        points += POINT.pack(act_id, qx, qy, CATEGORY_CODES.get(category, 255))
+        count += 1
+
+    return HEADER.pack(TILE_MAGIC, zoom, x, y, count) + bytes(points)
+
+
+def get_tile(zoom, x, y):
+    """Return the packed tile, encoding and caching it on a miss"""
+    key = tile_cache_key(zoom, x, y)
+    data = cache.get(key)
+    if data is None:
+        data = encode_tile(zoom, x, y)
+        cache.set(key, data, TILE_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_tiles_for(lat, lng):
+    """Evict every cached tile containing a point"""
+    cache.delete_many([
+        tile_cache_key(zoom, *tile_for(lat, lng, zoom))
+        for zoom in range(MIN_TILE_ZOOM, MAX_TILE_ZOOM + 1)
+    ])
+
+
+def invalidate_tiles_for_points(points):
+    """Evict every cached tile containing any of the (lat, lng) points"""
+    cache.delete_many(list({
+        tile_cache_key(zoom, *tile_for(lat, lng, zoom))
+        for lat, lng in points
+        for zoom in range(MIN_TILE_ZOOM, MAX_TILE_ZOOM + 1)
+    }))
@@ -0,0 +1,116 @@
+"""
+Daily act counts for time-series charts.
+
+ActDailyCount holds one row per (day, category, country, city) and is
+maintained from Act writes, so a year of history is at most a few
+thousand small rows no matter how many acts exist. Week and month buckets
+are summed from the daily rows at query time.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .counters import bulk_increment
+from .models import Act, ActDailyCount, location_key
+
+GRANULARITIES = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+DEFAULT_RANGE_DAYS = 365
+MAX_RANGE_DAYS = 366 * 5
+
+
+def add_daily_count(day, category, country, city, delta):
+    """Add ``delta`` acts to one (day, category, country, city) bucket"""
+    fields = {
+        'date': day,
+        'category': category,
+        'country_key': location_key(country),
+        'city_key': location_key(city),
+    }
+    if delta > 0:
+        ActDailyCount.objects.bulk_create([ActDailyCount(**fields)], ignore_conflicts=True)
+    ActDailyCount.objects.filter(**fields).update(count=F('count') + delta)
+
+
+def add_daily_counts(items):
+    """Add one act per (day, category, country, city) item in a few statements"""
+    increments = {}
+    for day, category, country, city in items:
+        key = (
+            ('date', day),
+            ('category', category),
+            ('country_key', location_key(country)),
+            ('city_key', location_key(city)),
+        )
+        deltas = increments.setdefault(key, {'count': 0})
+        deltas['count'] += 1
+    bulk_increment(ActDailyCount, increments)
+
+
+def get_timeseries(start, end, granularity='day', category=None, country=None, city=None):
+    """Return [{'date', 'total', 'category_breakdown'}] buckets between two dates"""
+    rows = ActDailyCount.objects.filter(date__range=(start, end), count__gt=0)
+    if category:
+        rows = rows.filter(category=category)
+    if country:
+        rows = rows.filter(country_key=location_key(country))
+    if city:
+        rows = rows.filter(city_key=location_key(city))
+
+    trunc = GRANULARITIES[granularity]
+    bucket = trunc('date') if trunc else F('date')
+    rows = (
+        rows.annotate(bucket=bucket)
+        .values('bucket', 'category')
+        .annotate(total=Sum('count'))
+        .order_by('bucket')
+    )
+
+    series = {}
+    for row in rows:
+        bucket_date = row['bucket']
+        if hasattr(bucket_date, 'date'):
+            bucket_date = bucket_date.date()
+        point = series.setdefault(bucket_date, {
+            'date': bucket_date.isoformat(),
+            'total': 0,
+            'category_breakdown': {},
+        })
+        point['total'] += row['total']
+        point['category_breakdown'][row['category']] = row['total']
+    return list(series.values())
+
+
+def default_range():
+    end = timezone.localdate()
+    return end - timedelta(days=DEFAULT_RANGE_DAYS - 1), end
+
+
+@transaction.atomic
+def rebuild_timeseries():
+    """Recompute every daily bucket from the Act table"""
+    ActDailyCount.objects.all().delete()
+    totals = {}
+    rows = (
+        Act.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'category', 'country', 'city')
+        .annotate(count=Count('id'))
+    )
+    for row in rows:
+        key = (row['day'], row['category'], location_key(row['country']), location_key(row['city']))
+        totals[key] = totals.get(key, 0) + row['count']
+
+    ActDailyCount.objects.bulk_create(
+        [
+            ActDailyCount(date=day, category=category, country_key=country_key, city_key=city_key, count=count)
+            for (day, category, country_key, city_key), count in totals.items()
+        ],
+        batch_size=1000,
+    )
+    return len(totals)
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ActViewSet
+from .views import ActViewSet, live_acts
 
 router = DefaultRouter()
 router.register(r'acts', ActViewSet, basename='act')
 
 urlpatterns = [
+    path('acts/live/', live_acts, name='act-live'),
     path('', include(router.urls)),
 ]
 
@@ -2,28 +2,117 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import filters
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
-from django.db.models import Count, Q, Sum
-from datetime import datetime, timedelta
-from .models import Act
-from .serializers import ActSerializer
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, IsAdminUser, SAFE_METHODS
+from django.db.models import Count, Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+import math
+from .models import Act, Category, location_key
+from .serializers import ActSerializer, act_only, act_rows, serialize_act_rows, serialize_acts, sparse_fields
+from .spatial import filter_bbox, nearest, METRES_PER_DEGREE
+from .clustering import get_clusters, clamp_zoom
+from .tiles import get_tile, MIN_TILE_ZOOM, MAX_TILE_ZOOM
+from .stats import get_stats
+from .bulk import bulk_create_acts, MAX_BULK_ACTS
+from .appreciations import appreciate, live_appreciation_count, maybe_flush
+from .timeseries import get_timeseries, default_range, GRANULARITIES, MAX_RANGE_DAYS
+from .pagination import ActKeysetPagination
+from .search import ActSearchFilter
+from .response_cache import cache_anonymous_response, response_cache_stats
+from .changes import get_changes
+from .live import feed, stream
+from .export import export_response, CSVRenderer, NDJSONRenderer
+
+NEARBY_DEFAULT_K = 20
+NEARBY_MAX_K = 100
+NEARBY_MAX_RADIUS_M = 50000
 
 
 class ActViewSet(viewsets.ModelViewSet):
     queryset = Act.objects.all()
     serializer_class = ActSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]  # Require auth for create, allow read for all
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    # Search runs last so it can order by relevance when no ?ordering= is given
+    filter_backends = [filters.OrderingFilter, ActSearchFilter]
     search_fields = ['description', 'city', 'country', 'submitted_by']
     ordering_fields = ['created_at', 'appreciation_count']
     ordering = ['-created_at']
     
+    @property
+    def paginator(self):
+        """Use keyset pagination when the client opts in with ?pagination=cursor"""
+        if not hasattr(self, '_paginator') and self.request.query_params.get('pagination') == 'cursor':
+            self._paginator = ActKeysetPagination()
+        return super().paginator
+    
+    def get_sparse_fields(self):
+        """Fields selected with ?fields= / ?omit= on reads (None means all)"""
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = None
+            if self.request.method in SAFE_METHODS:
+                self._sparse_fields = sparse_fields(self.request.query_params)
+        return self._sparse_fields
+    
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+    
     def perform_create(self, serializer):
         # Automatically set the user when creating an act
         serializer.save(user=self.request.user)
     
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """Create many acts in one request (list body, or {"acts": [...]})"""
+        data = request.data.get('acts') if isinstance(request.data, dict) else request.data
+        if not isinstance(data, list) or not data:
+            return Response(
+                {'error': 'Provide a non-empty list of acts'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(data) > MAX_BULK_ACTS:
+            return Response(
+                {'error': f'At most {MAX_BULK_ACTS} acts can be submitted at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = self.get_serializer(data=data, many=True)
+        serializer.is_valid(raise_exception=True)
+        
+        acts = bulk_create_acts([
+            Act(user=request.user, **validated_data) for validated_data in serializer.validated_data
+        ])
+        
+        return Response(
+            serialize_acts(Act.objects.filter(id__in=[act.id for act in acts]).order_by('id')),
+            status=status.HTTP_201_CREATED
+        )
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def appreciate(self, request, pk=None):
+        """Appreciate an act (once per user)"""
+        act = self.get_object()
+        created = appreciate(act, request.user)
+        if created:
+            maybe_flush()
+            act.refresh_from_db(fields=['appreciation_count'])
+        
+        return Response(
+            {
+                'appreciated': True,
+                'already_appreciated': not created,
+                'appreciation_count': live_appreciation_count(act),
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+    
     def get_queryset(self):
         queryset = Act.objects.all()
+        if self.action == 'retrieve':
+            # Only load the columns the requested fields need
+            queryset = act_only(queryset, self.get_sparse_fields())
         
         # Filter by category
         category = self.request.query_params.get('category', None)
@@ -45,7 +134,38 @@ class ActViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    @cache_anonymous_response
+    def list(self, request, *args, **kwargs):
+        """List acts through the single-query fast read path"""
+        fields = self.get_sparse_fields()
+        queryset = act_rows(self.filter_queryset(self.get_queryset()), fields)
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_act_rows(page, fields))
+        
+        return Response(serialize_act_rows(queryset, fields))
+    
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """Stream every matching act as CSV or NDJSON (?format=csv|ndjson or the Accept header)"""
+        # Content negotiation picked the renderer (unknown formats get a 404);
+        # without ?format= or a matching Accept header it defaults to CSV
+        export_format = request.accepted_renderer.format
+        
+        # Same filters, search and ordering as the list endpoint, without pagination
+        queryset = self.filter_queryset(self.get_queryset())
+        accepts_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        gzip = accepts_gzip and request.query_params.get('gzip', 'true').lower() != 'false'
+        return export_response(queryset, export_format, gzip=gzip, fields=self.get_sparse_fields())
+    
     @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Get acts changed and ids deleted since a sync token (?since=)"""
+        return Response(get_changes(request.query_params.get('since'), self.get_sparse_fields()))
+    
+    @action(detail=False, methods=['get'])
+    @cache_anonymous_response
     def community(self, request):
         """Get acts with images for community feed (Instagram-like)"""
         # Filter acts that have evidence_url (images)
@@ -54,68 +174,66 @@ class ActViewSet(viewsets.ModelViewSet):
         ).exclude(evidence_url='').order_by('-created_at')
         
         # Pagination
-        page = self.paginate_queryset(acts_with_images)
+        fields = self.get_sparse_fields()
+        page = self.paginate_queryset(act_rows(acts_with_images, fields))
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(serialize_act_rows(page, fields))
         
-        serializer = self.get_serializer(acts_with_images, many=True)
-        return Response(serializer.data)
+        return Response(serialize_acts(acts_with_images, fields))
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Get global statistics"""
-        total_acts = Act.objects.count()
-        
-        # Acts created today
-        today = datetime.now().date()
-        acts_today = Act.objects.filter(created_at__date=today).count()
-        
-        # Active regions (unique cities)
-        active_regions = Act.objects.exclude(city='').values('city').distinct().count()
-        
-        # Top region
-        top_region_data = (
-            Act.objects.exclude(city='')
-            .values('city')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-            .first()
-        )
-        top_region = {
-            'city': top_region_data['city'] if top_region_data else None,
-            'count': top_region_data['count'] if top_region_data else 0
-        }
-        
-        # Category breakdown
-        category_breakdown = (
-            Act.objects.values('category')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
-        category_dict = {item['category']: item['count'] for item in category_breakdown}
-        
-        # Total countries
-        total_countries = Act.objects.exclude(country='').values('country').distinct().count()
+        """Get global statistics from the incrementally maintained rollup"""
+        return Response(get_stats())
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Get hit/miss counters for the anonymous response cache"""
+        return Response(response_cache_stats())
+    
+    @action(detail=False, methods=['get'])
+    def timeseries(self, request):
+        """Get act counts over time from the daily rollup"""
+        granularity = request.query_params.get('granularity', 'day')
+        if granularity not in GRANULARITIES:
+            return Response(
+                {'error': f"granularity must be one of: {', '.join(GRANULARITIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Total cities (same as active_regions for consistency)
-        total_cities = active_regions
+        default_start, default_end = default_range()
+        try:
+            start = parse_date(request.query_params.get('start_date', '')) or default_start
+            end = parse_date(request.query_params.get('end_date', '')) or default_end
+        except ValueError:
+            return Response(
+                {'error': 'Dates must be YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start > end or (end - start).days > MAX_RANGE_DAYS:
+            return Response(
+                {'error': f'Date range must be ordered and at most {MAX_RANGE_DAYS} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Total appreciations
-        total_appreciations = Act.objects.aggregate(Sum('appreciation_count'))['appreciation_count__sum'] or 0
+        series = get_timeseries(
+            start,
+            end,
+            granularity=granularity,
+            category=request.query_params.get('category', None),
+            country=request.query_params.get('country', None),
+            city=request.query_params.get('city', None),
+        )
         
         return Response({
-            'total_acts': total_acts,
-            'acts_today': acts_today,
-            'active_regions': active_regions,
-            'total_cities': total_cities,
-            'top_region': top_region,
-            'category_breakdown': category_dict,
-            'total_countries': total_countries,
-            'total_appreciations': total_appreciations,
+            'granularity': granularity,
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'series': series,
         })
     
     @action(detail=False, methods=['get'])
+    @cache_anonymous_response
     def region(self, request):
         """Get acts by region (city or coordinates)"""
         city = request.query_params.get('city', None)
@@ -123,17 +241,20 @@ class ActViewSet(viewsets.ModelViewSet):
         lng = request.query_params.get('lng', None)
         
         if city:
-            acts = Act.objects.filter(city__icontains=city)
+            # Exact, case-insensitive match through the normalized city table
+            acts = Act.objects.filter(city_ref__name_key=location_key(city))
         elif lat and lng:
             # Simple proximity search (can be improved with proper geocoding)
             try:
                 lat = float(lat)
                 lng = float(lng)
+                # float() accepts "nan" and "inf", which the range check below would miss
+                if not (math.isfinite(lat) and math.isfinite(lng)):
+                    raise ValueError('Non-finite coordinate')
+                if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                    raise ValueError('Coordinate out of range')
                 # Find acts within ~1 degree (rough approximation)
-                acts = Act.objects.filter(
-                    latitude__range=(lat - 0.5, lat + 0.5),
-                    longitude__range=(lng - 0.5, lng + 0.5)
-                )
+                acts = filter_bbox(Act.objects.all(), lat - 0.5, lat + 0.5, lng - 0.5, lng + 0.5)
             except ValueError:
                 return Response(
                     {'error': 'Invalid latitude or longitude'},
@@ -145,7 +266,17 @@ class ActViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if not acts.exists():
+        # All counts in one conditional-aggregation query
+        week_ago = timezone.now() - timedelta(days=7)
+        aggregates = {
+            'total_acts': Count('id'),
+            'acts_this_week': Count('id', filter=Q(created_at__gte=week_ago)),
+        }
+        for category in Category.values:
+            aggregates[f'category_{category}'] = Count('id', filter=Q(category=category))
+        totals = acts.aggregate(**aggregates)
+        
+        if not totals['total_acts']:
             return Response({
                 'city': city or 'Unknown',
                 'total_acts': 0,
@@ -154,41 +285,36 @@ class ActViewSet(viewsets.ModelViewSet):
                 'category_breakdown': {}
             })
         
-        # Get region name from first act
-        region_city = acts.first().city or 'Unknown'
-        
-        # Calculate stats
-        total_acts = acts.count()
-        
-        # Acts this week
-        week_ago = datetime.now() - timedelta(days=7)
-        acts_this_week = acts.filter(created_at__gte=week_ago).count()
-        
         # Recent acts (last 10)
-        recent_acts = acts[:10]
-        recent_acts_data = ActSerializer(recent_acts, many=True).data
+        fields = self.get_sparse_fields()
+        recent_acts_data = serialize_acts(acts.order_by('-created_at')[:10], fields)
         
-        # Category breakdown
-        category_breakdown = (
-            acts.values('category')
-            .annotate(count=Count('id'))
-        )
-        category_dict = {item['category']: item['count'] for item in category_breakdown}
+        # Get region name from the most recent act
+        if fields is None or 'city' in fields:
+            region_city = recent_acts_data[0]['city'] or 'Unknown'
+        else:
+            region_city = acts.order_by('-created_at').values_list('city', flat=True).first() or 'Unknown'
+        
+        category_dict = {
+            category: totals[f'category_{category}']
+            for category in Category.values
+            if totals[f'category_{category}']
+        }
         
         return Response({
             'city': region_city,
-            'total_acts': total_acts,
-            'acts_this_week': acts_this_week,
+            'total_acts': totals['total_acts'],
+            'acts_this_week': totals['acts_this_week'],
             'recent_acts': recent_acts_data,
             'category_breakdown': category_dict,
         })
     
     @action(detail=False, methods=['get'])
+    @cache_anonymous_response
     def nearby_acts(self, request):
-        """Get individual acts near a clicked location"""
+        """Get the k acts closest to a clicked location, nearest first"""
         lat = request.query_params.get('lat', None)
         lng = request.query_params.get('lng', None)
-        radius = float(request.query_params.get('radius', 0.01))  # ~1km default
         
         if not lat or not lng:
             return Response(
@@ -200,21 +326,143 @@ class ActViewSet(viewsets.ModelViewSet):
             lat = float(lat)
             lng = float(lng)
             
-            # Find acts within radius (smaller radius for nearby acts)
-            acts = Act.objects.filter(
-                latitude__range=(lat - radius, lat + radius),
-                longitude__range=(lng - radius, lng + radius)
-            ).order_by('-created_at')[:20]  # Limit to 20 most recent
-            
-            acts_data = ActSerializer(acts, many=True).data
-            
-            return Response({
-                'acts': acts_data,
-                'count': len(acts_data),
-                'location': {'lat': lat, 'lng': lng}
-            })
+            # Great-circle radius in metres; the legacy `radius` param is in degrees
+            radius_m = request.query_params.get('radius_m', None)
+            if radius_m is not None:
+                radius_m = float(radius_m)
+            else:
+                radius_m = float(request.query_params.get('radius', 0.01)) * METRES_PER_DEGREE
+            k = int(request.query_params.get('k', NEARBY_DEFAULT_K))
+            # float() accepts "nan" and "inf", which would slip past the clamps below
+            if not all(math.isfinite(value) for value in (lat, lng, radius_m)):
+                raise ValueError('Non-finite coordinate or radius')
         except ValueError:
+            return Response(
+                {'error': 'Invalid latitude, longitude, radius or k'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
             return Response(
                 {'error': 'Invalid latitude or longitude'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        
+        # Cap the search so one request cannot scan the whole table
+        radius_m = min(max(radius_m, 0), NEARBY_MAX_RADIUS_M)
+        k = min(max(k, 1), NEARBY_MAX_K)
+        
+        matches = nearest(Act.objects.all(), lat, lng, radius_m, k)
+        acts_by_id = {
+            act_data['id']: act_data
+            for act_data in serialize_acts(
+                Act.objects.filter(id__in=[pk for _, pk in matches]), self.get_sparse_fields()
+            )
+        }
+        acts_data = []
+        for distance, pk in matches:
+            act_data = acts_by_id.get(pk)
+            if act_data is None:
+                continue  # Deleted between the two queries
+            act_data['distance_m'] = round(distance, 1)
+            acts_data.append(act_data)
+        
+        return Response({
+            'acts': acts_data,
+            'count': len(acts_data),
+            'location': {'lat': lat, 'lng': lng},
+            'radius_m': radius_m,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def clusters(self, request):
+        """Get pre-aggregated map clusters for a bounding box and zoom level"""
+        bbox = request.query_params.get('bbox', None)
+        zoom = request.query_params.get('zoom', None)
+        
+        if not bbox or zoom is None:
+            return Response(
+                {'error': 'Provide bbox (min_lng,min_lat,max_lng,max_lat) and zoom parameters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            min_lng, min_lat, max_lng, max_lat = [float(value) for value in bbox.split(',')]
+            zoom = clamp_zoom(zoom)
+            if not all(math.isfinite(value) for value in (min_lng, min_lat, max_lng, max_lat)):
+                raise ValueError('Non-finite bbox')
+        except ValueError:
+            return Response(
+                {'error': 'Invalid bbox or zoom'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            clusters = get_clusters(min_lng, min_lat, max_lng, max_lat, zoom)
+        except ValueError as error:
+            return Response(
+                {'error': f'{error}; zoom out or shrink the bbox'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            'zoom': zoom,
+            'clusters': clusters,
+            'count': len(clusters),
+        })
+    
+    @action(detail=False, methods=['get'], url_path=r'tiles/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)')
+    def tiles(self, request, z=None, x=None, y=None):
+        """Get act points for one slippy-map tile in the packed binary format"""
+        z, x, y = int(z), int(x), int(y)
+        
+        if z < MIN_TILE_ZOOM or z > MAX_TILE_ZOOM:
+            return Response(
+                {'error': f'Tiles are available for zoom {MIN_TILE_ZOOM}-{MAX_TILE_ZOOM}, use clusters below that'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if x >= 2 ** z or y >= 2 ** z:
+            return Response(
+                {'error': 'Tile coordinates out of range'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return HttpResponse(get_tile(z, x, y), content_type='application/octet-stream')
+
+
+async def live_acts(request):
+    """Stream newly created acts as Server-Sent Events (?category=, ?bbox=minLng,minLat,maxLng,maxLat)"""
+    category = request.GET.get('category') or None
+    if category and category not in Category.values:
+        return JsonResponse(
+            {'error': f"category must be one of: {', '.join(Category.values)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    bbox = request.GET.get('bbox')
+    if bbox:
+        try:
+            bbox = tuple(float(value) for value in bbox.split(','))
+            if len(bbox) != 4:
+                raise ValueError('Expected 4 values')
+        except ValueError:
+            return JsonResponse(
+                {'error': 'bbox must be min_lng,min_lat,max_lng,max_lat'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    else:
+        bbox = None
+    
+    subscription = feed.subscribe(category=category, bbox=bbox)
+    if subscription is None:
+        response = JsonResponse(
+            {'error': 'Too many live connections, please retry shortly'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        response['Retry-After'] = '10'
+        return response
+    
+    response = StreamingHttpResponse(stream(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop proxies buffering the stream
+    return response
@@ -5,9 +5,24 @@ set -o errexit
 # Install dependencies
 pip install -r requirements.txt
 
-# Run migrations
+# Run migrations (including the shared cache table)
 python manage.py migrate --no-input
 
+# Fill spatial grid cells for acts saved before the grid existed
+python manage.py backfill_grid_cells
+
+# Build the map cluster index on first deploy
+python manage.py rebuild_act_clusters --if-empty
+
+# Build the global stats rollup on first deploy
+python manage.py rebuild_stats --if-empty
+
+# Build the daily time-series rollup on first deploy
+python manage.py rebuild_timeseries --if-empty
+
+# Fix any drift in the incremental tree progress counters
+python manage.py reconcile_tree_progress
+
 # Collect static files
 python manage.py collectstatic --no-input
 
@@ -28,18 +28,22 @@ def send_message(request):
         )
     
     # Rate limiting: max 30 messages per hour per user
+    # (add/incr run atomically on the shared cache tier and keep the window's
+    # expiry, so the limit holds across workers)
     cache_key = f"chat_rate_limit_{request.user.id}"
-    message_count = cache.get(cache_key, 0)
+    cache.add(cache_key, 0, 3600)  # Start the 1 hour window on the first message
+    try:
+        message_count = cache.incr(cache_key)
+    except ValueError:
+        cache.set(cache_key, 1, 3600)
+        message_count = 1
     
-    if message_count >= 30:
+    if message_count > 30:
         return Response(
             {'error': 'You\'ve sent too many messages. Please wait a bit before chatting again!'}, 
             status=status.HTTP_429_TOO_MANY_REQUESTS
         )
     
-    # Increment counter (expires in 1 hour)
-    cache.set(cache_key, message_count + 1, 3600)
-    
     # Save user message
     user_msg = ChatMessage.objects.create(
         user=request.user,
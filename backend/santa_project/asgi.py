@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'santa_project.settings')
 
 application = get_asgi_application()
+
+# Imported once the app registry is ready; stops live feeds on disconnect
+from acts.live import cancel_on_disconnect  # noqa: E402
+
+application = cancel_on_disconnect(application)
@@ -0,0 +1,238 @@
+"""
+Two-tier cache backend: a bounded in-process LRU in front of a shared cache.
+
+Reads are answered from the local LRU when possible and otherwise from the
+shared backend (the database cache table by default), whose value is then
+kept locally for at most LOCAL_TIMEOUT seconds. Writes go to both tiers.
+add, incr and decr always run against the shared tier and drop the local
+copy; plain reads may lag another worker's write by up to LOCAL_TIMEOUT
+seconds.
+
+Counters are only exact across workers when the shared backend increments
+atomically. Django's DatabaseCache does not (its incr is a get followed by
+a set, which also resets the key's expiry), so the shared tier uses
+AtomicDatabaseCache below, whose incr/decr update the row in place under a
+row lock and keep the expiry set when the key was added.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'santa_project.cache.TwoTierCache',
+            'OPTIONS': {
+                'SHARED_CACHE': 'shared',
+                'LOCAL_MAX_ENTRIES': 1000,
+                'LOCAL_TIMEOUT': 5,
+            },
+        },
+        'shared': {
+            'BACKEND': 'santa_project.cache.AtomicDatabaseCache',
+            'LOCATION': 'django_cache',
+        },
+    }
+"""
+import base64
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections, models, router, transaction
+from django.utils.timezone import now as tz_now
+
+_MISSING = object()
+
+
+class AtomicDatabaseCache(DatabaseCache):
+    """DatabaseCache whose incr/decr are atomic and keep the key's expiry"""
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        quote_name = connection.ops.quote_name
+        table = quote_name(self._table)
+        where = '%s = %%s' % quote_name('cache_key')
+
+        with transaction.atomic(using=db), connection.cursor() as cursor:
+            # No-op write first, so concurrent increments of this key queue
+            # up on the row lock instead of reading the same value
+            cursor.execute(
+                'UPDATE %s SET %s = %s WHERE %s' % (table, quote_name('expires'), quote_name('expires'), where),
+                [key],
+            )
+            cursor.execute(
+                'SELECT %s, %s FROM %s WHERE %s' % (quote_name('value'), quote_name('expires'), table, where),
+                [key],
+            )
+            row = cursor.fetchone()
+            if row is not None:
+                value, expires = row
+                expression = models.Expression(output_field=models.DateTimeField())
+                for converter in connection.ops.get_db_converters(expression) + expression.get_db_converters(connection):
+                    expires = converter(expires, expression, connection)
+            if row is None or expires < tz_now():
+                raise ValueError("Key '%s' not found" % key)
+
+            value = pickle.loads(base64.b64decode(connection.ops.process_clob(value).encode())) + delta
+            cursor.execute(
+                'UPDATE %s SET %s = %%s WHERE %s' % (table, quote_name('value'), where),
+                [base64.b64encode(pickle.dumps(value, self.pickle_protocol)).decode('latin1'), key],
+            )
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+
+class TwoTierCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED_CACHE', 'shared')
+        self._local_max_entries = int(options.get('LOCAL_MAX_ENTRIES', 1000))
+        self._local_timeout = float(options.get('LOCAL_TIMEOUT', 5))
+        self._local = OrderedDict()  # key -> (pickled value, expiry)
+        self._lock = threading.Lock()
+        self._counters = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'evictions': 0}
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    # Local LRU tier
+
+    def _local_expiry(self, timeout=DEFAULT_TIMEOUT):
+        expiry = time.monotonic() + self._local_timeout
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is not None:
+            expiry = min(expiry, time.monotonic() + max(0, timeout))
+        return expiry
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[1] <= time.monotonic():
+                del self._local[key]
+                return _MISSING
+            self._local.move_to_end(key)
+            self._counters['local_hits'] += 1
+        return pickle.loads(entry[0])
+
+    def _local_set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        expiry = self._local_expiry(timeout)
+        with self._lock:
+            self._local[key] = (pickled, expiry)
+            self._local.move_to_end(key)
+            while len(self._local) > self._local_max_entries:
+                self._local.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def _local_delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self._local_get(local_key)
+        if value is not _MISSING:
+            return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('shared_hits')
+        self._local_set(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remote = []
+        for key in keys:
+            value = self._local_get(self.make_and_validate_key(key, version=version))
+            if value is _MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        if remote:
+            fetched = self.shared.get_many(remote, version=version)
+            self._count('shared_hits', len(fetched))
+            self._count('misses', len(remote) - len(fetched))
+            for key, value in fetched.items():
+                self._local_set(self.make_key(key, version=version), value)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        self.shared.set(key, value, timeout, version=version)
+        self._local_set(local_key, value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._local_set(self.make_and_validate_key(key, version=version), value, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        self._local_delete(local_key)
+        return self.shared.add(key, value, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._local_delete(self.make_and_validate_key(key, version=version))
+        return self.shared.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local_delete(self.make_and_validate_key(key, version=version))
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self._local_delete(self.make_and_validate_key(key, version=version))
+        return self.shared.decr(key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        if self._local_get(self.make_and_validate_key(key, version=version)) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def delete(self, key, version=None):
+        self._local_delete(self.make_and_validate_key(key, version=version))
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self._local_delete(*(self.make_and_validate_key(key, version=version) for key in keys))
+        self.shared.delete_many(keys, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def stats(self):
+        """Return this process's hit/miss/eviction counters and local tier size"""
+        with self._lock:
+            stats = dict(self._counters, local_entries=len(self._local))
+        lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        stats['local_max_entries'] = self._local_max_entries
+        stats['hit_rate'] = round((stats['local_hits'] + stats['shared_hits']) / lookups, 4) if lookups else None
+        return stats
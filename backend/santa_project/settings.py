@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import importlib.util
 from pathlib import Path
 from decouple import config
 import dj_database_url
@@ -117,6 +118,29 @@ else:
         }
     }
 
+# Caching: a bounded per-process LRU in front of the database cache table, so
+# rate limits and cached data are shared by every gunicorn worker
+# (`migrate` creates the table, see acts/migrations/0012_cache_table.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'santa_project.cache.TwoTierCache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'SHARED_CACHE': 'shared',
+            'LOCAL_MAX_ENTRIES': config('CACHE_LOCAL_MAX_ENTRIES', default=1000, cast=int),
+            'LOCAL_TIMEOUT': config('CACHE_LOCAL_TIMEOUT', default=5, cast=int),
+        },
+    },
+    'shared': {
+        'BACKEND': 'santa_project.cache.AtomicDatabaseCache',
+        'LOCATION': 'django_cache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_SHARED_MAX_ENTRIES', default=20000, cast=int),
+            'CULL_FREQUENCY': 4,
+        },
+    },
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -178,6 +202,22 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 100,
 }
 
+# JSON backend for API responses and request bodies: 'stdlib' (DRF's own) or,
+# opt-in, 'orjson' when installed. orjson is faster but not byte-identical:
+# it writes NaN/Infinity as null where DRF refuses them, and leaves U+2028/U+2029
+# unescaped
+API_JSON_BACKEND = config('API_JSON_BACKEND', default='stdlib')
+if API_JSON_BACKEND == 'orjson' and importlib.util.find_spec('orjson') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'santa_project.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = [
+        'santa_project.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ]
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24),
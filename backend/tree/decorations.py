@@ -0,0 +1,123 @@
+"""
+Decoration generation engine.
+
+Every auto-placed decoration is derived from its act with a random number
+generator seeded by ``(user_id, act_id)``, so the same inputs always give
+the same type, colour, size and position. A whole tree (or any batch of
+acts) is generated in one call, which is what my_tree sync, the Act
+signals and the auto_decorate endpoint all use.
+"""
+import random
+
+from .models import TreeDecoration
+from .placement import slot_position
+
+DECORATION_COLORS = {
+    'ornament': ['#DC2626', '#16A34A', '#D97706', '#2563EB', '#9333EA'],  # Red, Green, Orange, Blue, Purple
+    'star': ['#FBBF24', '#FCD34D'],  # Gold, Light Gold
+    'light': ['#FEF3C7', '#FDE68A'],  # Warm White, Light Yellow
+    'garland': ['#16A34A', '#15803D'],  # Green shades
+    'gift': ['#DC2626', '#2563EB', '#16A34A'],  # Red, Blue, Green
+    'snowflake': ['#E0E7FF', '#DBEAFE'],  # Light Blue, Light Blue
+}
+DEFAULT_COLORS = ['#DC2626']
+
+# Act numbers that always unlock a specific decoration (milestones)
+MILESTONE_DECORATIONS = {
+    5: ['star'],  # Star Topper
+    10: ['light'],  # Lights
+    15: ['garland'],  # Garland
+    25: ['snowflake'],  # Snowflakes
+    50: ['star', 'ornament'],  # Golden Ornaments
+    100: ['star', 'gift'],  # Special Tree Topper
+}
+
+# (min act number, type to make sure appears, chance of forcing it, types to pick from)
+UNLOCK_TIERS = [
+    (100, None, 0, ['ornament', 'star', 'snowflake', 'gift']),
+    (50, 'star', 0.3, ['ornament', 'star', 'snowflake']),
+    (25, 'snowflake', 0.4, ['ornament', 'snowflake']),
+    (15, 'garland', 0.4, ['ornament', 'garland']),
+    (10, 'light', 0.5, ['ornament', 'light']),
+]
+
+
+def decoration_rng(user_id, act_id):
+    """Random generator for one decoration, seeded by (user_id, act_id)"""
+    return random.Random(f'tree-decoration:{user_id}:{act_id}')
+
+
+def decoration_type_for(act_number, rng, existing_types=()):
+    """Determine decoration type based on act number (1-indexed) and milestones"""
+    if act_number in MILESTONE_DECORATIONS:
+        return rng.choice(MILESTONE_DECORATIONS[act_number])
+
+    for min_act_number, ensured_type, chance, choices in UNLOCK_TIERS:
+        if act_number >= min_act_number:
+            # Make sure newly unlocked types actually show up on the tree
+            if ensured_type and ensured_type not in existing_types and rng.random() < chance:
+                return ensured_type
+            return rng.choice(choices)
+    return 'ornament'
+
+
+def auto_position(total_acts, existing_count, tree_level, rng):
+    """Calculate automatic position for decoration on tree"""
+    # Tree is roughly triangular
+    # Y: spread vertically over 65% of the tree height based on count
+    y_spacing = 65 / max(1, total_acts)
+    y_position = min(80, max(15, 15 + existing_count * y_spacing))
+
+    # X: centered, with more variation for higher tree levels
+    x_variance = 10 + (tree_level * 5)
+    x_position = min(70, max(30, 50 + rng.uniform(-x_variance, x_variance)))
+
+    return {
+        'x': round(x_position, 2),
+        'y': round(y_position, 2)
+    }
+
+
+def build_decorations(user_id, acts, existing_types=(), existing_count=0, total_acts=None, tree_level=1,
+                      allocator=None):
+    """
+    Build unsaved auto-placed decorations for a batch of acts.
+
+    ``acts`` is an ordered iterable of ``(act_id, act_number)`` pairs, where
+    act_number is the act's 1-indexed position among the user's acts.
+    ``existing_types`` and ``existing_count`` describe decorations already on
+    the tree; both grow as the batch is generated.
+
+    With a ``SlotAllocator`` (tree.placement) each decoration takes a free
+    grid slot; once the grid is full, or without an allocator, the position
+    falls back to ``auto_position``.
+    """
+    acts = list(acts)
+    if total_acts is None:
+        total_acts = existing_count + len(acts)
+    existing_types = set(existing_types)
+
+    decorations = []
+    for act_id, act_number in acts:
+        # Decorations not tied to an act are seeded by their place on the tree
+        rng = decoration_rng(user_id, act_id if act_id is not None else f'#{existing_count}')
+        decoration_type = decoration_type_for(act_number, rng, existing_types)
+        existing_types.add(decoration_type)
+        position = auto_position(total_acts, existing_count, tree_level, rng)
+        slot = allocator.allocate() if allocator is not None else None
+        if slot is not None:
+            position = slot_position(slot)
+
+        decorations.append(TreeDecoration(
+            user_id=user_id,
+            decoration_type=decoration_type,
+            position_x=position['x'],
+            position_y=position['y'],
+            color=rng.choice(DECORATION_COLORS.get(decoration_type, DEFAULT_COLORS)),
+            size=round(rng.uniform(0.8, 1.2), 3),
+            is_auto_placed=True,
+            unlocked_by_act_id=act_id,
+            slot=slot,
+        ))
+        existing_count += 1
+    return decorations
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from acts.models import Act
+from tree.models import TreeDecoration, UserTreeProgress, tree_level_for
+from tree.snapshot import bump_tree_version
+
+
+class Command(BaseCommand):
+    help = 'Recount UserTreeProgress from acts and decorations, fixing any drift in the incremental counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        act_counts = dict(
+            Act.objects.filter(user__isnull=False).values('user_id').annotate(count=Count('id')).values_list('user_id', 'count')
+        )
+        decoration_counts = dict(
+            TreeDecoration.objects.values('user_id').annotate(count=Count('id')).values_list('user_id', 'count')
+        )
+
+        with transaction.atomic():
+            progresses = {progress.user_id: progress for progress in UserTreeProgress.objects.select_for_update()}
+            drifted = []
+            for user_id, progress in progresses.items():
+                total_acts = act_counts.get(user_id, 0)
+                expected = (total_acts, decoration_counts.get(user_id, 0), tree_level_for(total_acts))
+                if (progress.total_acts, progress.total_decorations, progress.tree_level) != expected:
+                    progress.total_acts, progress.total_decorations, progress.tree_level = expected
+                    progress.last_updated = timezone.now()
+                    drifted.append(progress)
+
+            # Users with acts or decorations but no progress row yet
+            missing = [
+                UserTreeProgress(
+                    user_id=user_id,
+                    total_acts=act_counts.get(user_id, 0),
+                    total_decorations=decoration_counts.get(user_id, 0),
+                    tree_level=tree_level_for(act_counts.get(user_id, 0)),
+                )
+                for user_id in (set(act_counts) | set(decoration_counts)) - set(progresses)
+            ]
+
+            if not options['dry_run']:
+                UserTreeProgress.objects.bulk_update(
+                    drifted, ['total_acts', 'total_decorations', 'tree_level', 'last_updated'], batch_size=500
+                )
+                UserTreeProgress.objects.bulk_create(missing, batch_size=500, ignore_conflicts=True)
+                bump_tree_version(*(progress.user_id for progress in drifted + missing))
+
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {len(drifted)} drifted and {len(missing)} missing progress rows '
+            f'out of {len(progresses)} checked'
+        ))
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tree', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='treedecoration',
+            name='slot',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Occupancy-grid slot held by an auto-placed decoration (see tree.placement)', null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='treedecoration',
+            constraint=models.UniqueConstraint(condition=models.Q(('slot__isnull', False)), fields=('user', 'slot'), name='unique_tree_slot_per_user'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tree', '0002_decoration_slot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertreeprogress',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text="Bumped on every change to the user's tree; keys cached snapshots (see tree.snapshot)"),
+        ),
+    ]
@@ -1,7 +1,21 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, F, Value, When
 from django.contrib.auth.models import User
+from django.utils import timezone
 from acts.models import Act
 
+# Tree levels based on acts count: (max acts, level), level 5 beyond the last
+TREE_LEVEL_THRESHOLDS = ((10, 1), (25, 2), (50, 3), (100, 4))
+MAX_TREE_LEVEL = 5
+
+
+def tree_level_for(total_acts):
+    """Tree level reached with a given number of acts"""
+    for max_acts, level in TREE_LEVEL_THRESHOLDS:
+        if total_acts <= max_acts:
+            return level
+    return MAX_TREE_LEVEL
+
 
 class TreeDecoration(models.Model):
     DECORATION_TYPES = [
@@ -52,6 +66,11 @@ class TreeDecoration(models.Model):
         default=True,
         help_text="Whether decoration was auto-placed or manually positioned"
     )
+    slot = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text="Occupancy-grid slot held by an auto-placed decoration (see tree.placement)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -61,11 +80,63 @@ class TreeDecoration(models.Model):
             models.Index(fields=['user', 'decoration_type']),
             models.Index(fields=['user', 'created_at']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'slot'],
+                condition=models.Q(slot__isnull=False),
+                name='unique_tree_slot_per_user',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.username}'s {self.get_decoration_type_display()} at ({self.position_x}, {self.position_y})"
 
 
+class UserTreeProgressManager(models.Manager):
+    def counts_for(self, user_id):
+        """Full recount of a user's progress fields"""
+        total_acts = Act.objects.filter(user_id=user_id).count()
+        return {
+            'total_acts': total_acts,
+            'total_decorations': TreeDecoration.objects.filter(user_id=user_id).count(),
+            'tree_level': tree_level_for(total_acts),
+        }
+    
+    def adjust(self, user_id, acts=0, decorations=0):
+        """
+        Atomically apply counter deltas to a user's progress with F() updates.
+        
+        The first increment for a user without a progress row seeds the row
+        from a full count, which already includes the change being applied.
+        """
+        # SET expressions see the old total_acts, so shift the thresholds
+        tree_level = Case(
+            *[When(total_acts__lte=max_acts - acts, then=Value(level)) for max_acts, level in TREE_LEVEL_THRESHOLDS],
+            default=Value(MAX_TREE_LEVEL),
+        )
+        updated = self.filter(user_id=user_id).update(
+            total_acts=F('total_acts') + acts,
+            total_decorations=F('total_decorations') + decorations,
+            tree_level=tree_level,
+            last_updated=timezone.now(),
+        )
+        if updated or (acts <= 0 and decorations <= 0):
+            return
+        try:
+            with transaction.atomic():
+                self.create(user_id=user_id, **self.counts_for(user_id))
+        except IntegrityError:
+            # Created concurrently; apply the delta to that row instead
+            self.adjust(user_id, acts, decorations)
+    
+    def for_user(self, user):
+        """Read a user's progress without writing (unsaved and recounted if missing)"""
+        try:
+            return self.get(user=user)
+        except self.model.DoesNotExist:
+            return self.model(user=user, **self.counts_for(user.id))
+
+
 class UserTreeProgress(models.Model):
     user = models.OneToOneField(
         User, 
@@ -85,25 +156,18 @@ class UserTreeProgress(models.Model):
         default=1,
         help_text="Current tree level (1-5)"
     )
+    version = models.PositiveIntegerField(
+        default=1,
+        help_text="Bumped on every change to the user's tree; keys cached snapshots (see tree.snapshot)"
+    )
     last_updated = models.DateTimeField(auto_now=True)
     
+    objects = UserTreeProgressManager()
+    
     def update_progress(self):
-        """Update progress based on user's acts"""
-        self.total_acts = self.user.acts.count()
-        self.total_decorations = self.user.tree_decorations.count()
-        
-        # Tree levels based on acts count
-        if self.total_acts <= 10:
-            self.tree_level = 1
-        elif self.total_acts <= 25:
-            self.tree_level = 2
-        elif self.total_acts <= 50:
-            self.tree_level = 3
-        elif self.total_acts <= 100:
-            self.tree_level = 4
-        else:
-            self.tree_level = 5
-        
+        """Recount progress from the user's acts and decorations (used to reconcile drift)"""
+        for field, value in UserTreeProgress.objects.counts_for(self.user_id).items():
+            setattr(self, field, value)
         self.save()
         return self
     
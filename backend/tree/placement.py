@@ -0,0 +1,104 @@
+"""
+Occupancy-grid placement for auto-placed decorations.
+
+The tree silhouette (a triangle with its apex at the top centre and its base
+along the bottom of the drawable area, in the same 0-100 percentage space
+as ``position_x``/``position_y``) is covered by a fixed, staggered grid of
+slots. Slots are numbered in a fixed scattered order so that early
+decorations are spread over the whole tree instead of piling up.
+
+A user's occupancy is a bitmask over those slot numbers, built from the
+``slot`` column of their decorations. Handing out a slot takes the lowest
+free bit, so allocation is O(1) and a batch of N is O(N). Deleting a
+decoration or moving it by hand frees its slot.
+
+Allocation for a user is serialized by locking their User row for the rest
+of the transaction, and a partial unique constraint on ``(user, slot)``
+backs that up at the database level.
+"""
+import random
+
+from django.contrib.auth.models import User
+
+from .models import TreeDecoration
+
+# Drawable tree area, matching the drag bounds in TreeCanvas
+TREE_APEX = (50.0, 12.0)
+TREE_BASE_Y = 85.0
+TREE_HALF_WIDTH = 25.0
+SLOT_MARGIN = 2.0
+SLOT_SPACING_X = 4.0
+SLOT_SPACING_Y = 3.5
+FIRST_ROW_Y = 20.0
+
+
+def _build_slots():
+    slots = []
+    y = FIRST_ROW_Y
+    row = 0
+    while y <= TREE_BASE_Y - SLOT_MARGIN:
+        half_width = TREE_HALF_WIDTH * (y - TREE_APEX[1]) / (TREE_BASE_Y - TREE_APEX[1]) - SLOT_MARGIN
+        # Stagger alternate rows by half a slot so neighbours do not line up
+        offset = SLOT_SPACING_X / 2 if row % 2 else 0.0
+        x = TREE_APEX[0] - half_width + ((half_width + offset) % SLOT_SPACING_X)
+        while x <= TREE_APEX[0] + half_width:
+            slots.append((round(x, 2), round(y, 2)))
+            x += SLOT_SPACING_X
+        y += SLOT_SPACING_Y
+        row += 1
+    # Fixed scattered order (the seed never changes, so slot numbers are stable)
+    random.Random('tree-slots').shuffle(slots)
+    return tuple(slots)
+
+
+SLOTS = _build_slots()
+ALL_SLOTS_MASK = (1 << len(SLOTS)) - 1
+
+
+def slot_position(slot):
+    """Return the {'x', 'y'} position of a slot"""
+    x, y = SLOTS[slot]
+    return {'x': x, 'y': y}
+
+
+class SlotAllocator:
+    """Free-slot bitmask for one user's tree"""
+
+    def __init__(self, occupied=()):
+        self._free = ALL_SLOTS_MASK
+        for slot in occupied:
+            if slot is not None and 0 <= slot < len(SLOTS):
+                self._free &= ~(1 << slot)
+
+    @classmethod
+    def for_user(cls, user_id):
+        """
+        Lock a user's tree and build the allocator from the slots their
+        decorations hold. Must run inside ``transaction.atomic()``; the lock
+        is held until it commits.
+        """
+        list(User.objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True))
+        return cls(
+            TreeDecoration.objects.filter(user_id=user_id, slot__isnull=False).values_list('slot', flat=True)
+        )
+
+    @property
+    def free_count(self):
+        return bin(self._free).count('1')
+
+    def allocate(self):
+        """Take the next free slot, or None when the tree is full"""
+        if not self._free:
+            return None
+        lowest = self._free & -self._free
+        self._free ^= lowest
+        return lowest.bit_length() - 1
+
+    def allocate_many(self, count):
+        """Take up to ``count`` slots (None for each one the tree has no room for)"""
+        return [self.allocate() for _ in range(count)]
+
+    def free(self, slot):
+        """Return a slot to the pool"""
+        if slot is not None and 0 <= slot < len(SLOTS):
+            self._free |= 1 << slot
@@ -0,0 +1,166 @@
+"""
+Server-side SVG rendering of a user's tree.
+
+Draws the same scene as TreeCanvas (tree, decorations at their percentage
+positions, stats footer like the exported image) straight from
+TreeDecoration rows, so sharing and link previews need no browser work.
+Rendered SVG is cached per tree version (tree.snapshot), so repeat views
+of an unchanged tree cost a version read and one cache read. Versions are
+database counters that never go backwards, so a cached render cannot be
+served for a later state of the tree.
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.html import escape
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .models import TreeDecoration, UserTreeProgress
+from .snapshot import TREE_SNAPSHOT_TIMEOUT
+
+# Same box as the tree area in TreeCanvas (max 500x700), plus a stats footer
+TREE_WIDTH = 500
+TREE_HEIGHT = 700
+FOOTER_HEIGHT = 120
+DECORATION_SIZE = 30
+
+# One symbol per decoration type, drawn in a 30x30 box and tinted through
+# currentColor by each <use>
+DECORATION_SYMBOLS = {
+    'ornament': (
+        '<circle cx="15" cy="16" r="11" fill="currentColor" stroke="#FFFFFF" stroke-width="1.5"/>'
+        '<rect x="12.5" y="2.5" width="5" height="3.5" fill="#D97706"/>'
+        '<circle cx="11.5" cy="12.5" r="2.5" fill="#FFFFFF" fill-opacity="0.6"/>'
+    ),
+    'star': (
+        '<polygon points="15,1 18.5,10.5 28.5,11 20.5,17.5 23.5,27.5 15,21.5 6.5,27.5 9.5,17.5 1.5,11 11.5,10.5" '
+        'fill="currentColor" stroke="#D97706" stroke-width="1"/>'
+    ),
+    'light': (
+        '<circle cx="15" cy="15" r="10" fill="currentColor"/>'
+        '<circle cx="15" cy="15" r="5" fill="#FFFFFF" fill-opacity="0.8"/>'
+    ),
+    'garland': (
+        '<path d="M2 10 Q15 26 28 10" fill="none" stroke="currentColor" stroke-width="4" stroke-linecap="round"/>'
+        '<circle cx="8" cy="16" r="2" fill="#DC2626"/><circle cx="15" cy="19" r="2" fill="#FBBF24"/>'
+        '<circle cx="22" cy="16" r="2" fill="#2563EB"/>'
+    ),
+    'gift': (
+        '<rect x="4" y="9" width="22" height="17" fill="currentColor" stroke="#FFFFFF" stroke-width="1.5"/>'
+        '<path d="M15 9 V26 M4 17 H26" stroke="#FFFFFF" stroke-width="2"/>'
+        '<path d="M15 9 Q9 2 8 8 Z M15 9 Q21 2 22 8 Z" fill="#FBBF24"/>'
+    ),
+    'snowflake': (
+        '<path d="M15 2 V28 M3.7 8.5 L26.3 21.5 M3.7 21.5 L26.3 8.5" stroke="currentColor" '
+        'stroke-width="2.5" stroke-linecap="round"/>'
+        '<circle cx="15" cy="15" r="2.5" fill="currentColor"/>'
+    ),
+}
+DEFAULT_SYMBOL = 'ornament'
+
+
+class SVGRenderer(BaseRenderer):
+    """
+    Lets DRF content negotiation accept image/svg+xml.
+
+    Rendered trees bypass rendering entirely; only error payloads are
+    rendered here, as JSON.
+    """
+    media_type = 'image/svg+xml'
+    format = 'svg'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data, renderer_context=renderer_context)
+
+
+def _tree_shape(tree_level):
+    """Layered tree silhouette covering the placement grid; fuller at higher levels"""
+    tiers = 2 + tree_level
+    top, bottom = 0.08 * TREE_HEIGHT, 0.88 * TREE_HEIGHT
+    center = TREE_WIDTH / 2
+    step = (bottom - top) / tiers
+    parts = [
+        f'<rect x="{center - 22:g}" y="{bottom - 4:g}" width="44" height="60" rx="4" fill="#92400E"/>'
+    ]
+    for tier in range(tiers):
+        tier_top = top + tier * step * 0.8
+        tier_bottom = top + (tier + 1) * step + (step * 0.2 if tier < tiers - 1 else 0)
+        half_width = 0.3 * TREE_WIDTH * (tier_bottom - top) / (bottom - top)
+        shade = '#15803D' if tier % 2 else '#16A34A'
+        parts.append(
+            f'<polygon points="{center:g},{tier_top:.1f} {center + half_width:.1f},{tier_bottom:.1f} '
+            f'{center - half_width:.1f},{tier_bottom:.1f}" fill="{shade}"/>'
+        )
+    # Star topper
+    parts.append(
+        f'<use href="#star" x="{center - 22:g}" y="{top - 30:.1f}" width="44" height="44" color="#FBBF24"/>'
+    )
+    return ''.join(parts)
+
+
+def render_tree_svg(username, progress, decorations):
+    """
+    Render a tree as an SVG document.
+
+    ``progress`` needs total_acts, total_decorations and tree_level;
+    ``decorations`` yields (decoration_type, position_x, position_y, color, size)
+    rows in drawing order.
+    """
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {TREE_WIDTH} {TREE_HEIGHT + FOOTER_HEIGHT}" '
+        f'width="{TREE_WIDTH}" height="{TREE_HEIGHT + FOOTER_HEIGHT}">',
+        f'<title>{escape(username)}\'s Christmas Tree of Kindness</title>',
+        '<defs><linearGradient id="sky" x1="0" y1="0" x2="0" y2="1">'
+        '<stop offset="0" stop-color="#E0F2FE"/><stop offset="0.5" stop-color="#F0F9FF"/>'
+        '<stop offset="1" stop-color="#FFFFFF"/></linearGradient>',
+    ]
+    for name, shape in DECORATION_SYMBOLS.items():
+        parts.append(f'<symbol id="{name}" viewBox="0 0 30 30">{shape}</symbol>')
+    parts.append('</defs>')
+    parts.append(f'<rect width="{TREE_WIDTH}" height="{TREE_HEIGHT + FOOTER_HEIGHT}" fill="url(#sky)"/>')
+    parts.append(_tree_shape(progress.tree_level))
+
+    for decoration_type, position_x, position_y, color, size in decorations:
+        symbol = decoration_type if decoration_type in DECORATION_SYMBOLS else DEFAULT_SYMBOL
+        side = DECORATION_SIZE * (size or 1)
+        x = position_x / 100 * TREE_WIDTH - side / 2
+        y = position_y / 100 * TREE_HEIGHT - side / 2
+        parts.append(
+            f'<use href="#{symbol}" x="{x:.1f}" y="{y:.1f}" width="{side:.1f}" height="{side:.1f}" '
+            f'color="{escape(color)}"/>'
+        )
+
+    # Stats footer, matching the exported image
+    parts.append(
+        f'<rect y="{TREE_HEIGHT}" width="{TREE_WIDTH}" height="{FOOTER_HEIGHT}" fill="#FFFFFF" fill-opacity="0.95"/>'
+        f'<g font-family="-apple-system, BlinkMacSystemFont, \'Segoe UI\', Roboto, sans-serif" '
+        f'text-anchor="middle" fill="#0F172A">'
+        f'<text x="{TREE_WIDTH / 2:g}" y="{TREE_HEIGHT + 48}" font-size="26" font-weight="bold">'
+        f'{escape(username)}\'s Tree of Kindness</text>'
+        f'<text x="{TREE_WIDTH / 2:g}" y="{TREE_HEIGHT + 88}" font-size="18" fill="#475569">'
+        f'{progress.total_acts} acts • {progress.total_decorations} decorations • '
+        f'Level {progress.tree_level}</text></g>'
+    )
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def tree_svg(user_id, version):
+    """
+    Return a user's rendered tree, cached for the given tree version.
+
+    The user, progress and decorations are only loaded on a cache miss;
+    nothing is cached without a version. Raises User.DoesNotExist for an
+    unknown user.
+    """
+    key = f'tree_svg:{user_id}:v{version}'
+    svg = cache.get(key) if version is not None else None
+    if svg is None:
+        user = User.objects.get(pk=user_id)
+        decorations = TreeDecoration.objects.filter(user=user).order_by('created_at', 'id').values_list(
+            'decoration_type', 'position_x', 'position_y', 'color', 'size'
+        )
+        svg = render_tree_svg(user.username, UserTreeProgress.objects.for_user(user), decorations)
+        if version is not None:
+            cache.set(key, svg, TREE_SNAPSHOT_TIMEOUT)
+    return svg
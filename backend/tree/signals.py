@@ -1,86 +1,118 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from acts.models import Act
+from acts.signals import acts_bulk_created
 from .models import TreeDecoration, UserTreeProgress
-import random
+from .decorations import build_decorations
+from .placement import SlotAllocator
+from .snapshot import bump_tree_version
 
 
 @receiver(post_save, sender=Act)
 def auto_decorate_tree(sender, instance, created, **kwargs):
     """Automatically add decoration to user's tree when act is created"""
-    if created and instance.user:
-        user = instance.user
-        
-        # Get or create progress
-        progress, _ = UserTreeProgress.objects.get_or_create(user=user)
-        progress.update_progress()
-        
-        # Get existing decorations count
-        existing_count = TreeDecoration.objects.filter(user=user).count()
-        total_acts = progress.total_acts
-        
-        # Determine decoration type based on acts count
-        decoration_type = 'ornament'  # Default
-        
-        if total_acts >= 100:
-            decoration_type = random.choice(['ornament', 'star', 'snowflake', 'gift'])
-        elif total_acts >= 50:
-            decoration_type = random.choice(['ornament', 'star', 'snowflake'])
-        elif total_acts >= 25:
-            decoration_type = random.choice(['ornament', 'snowflake'])
-        elif total_acts >= 15:
-            decoration_type = random.choice(['ornament', 'garland'])
-        elif total_acts >= 10:
-            decoration_type = random.choice(['ornament', 'light'])
-        elif total_acts >= 5:
-            # First decoration gets a star
-            decoration_type = 'star' if existing_count == 0 else 'ornament'
-        else:
-            decoration_type = 'ornament'
-        
-        # Calculate auto position
-        position = _calculate_auto_position(total_acts, existing_count, progress.tree_level)
-        
-        # Color based on decoration type
-        colors = {
-            'ornament': ['#DC2626', '#16A34A', '#D97706', '#2563EB', '#9333EA'],
-            'star': ['#FBBF24', '#FCD34D'],
-            'light': ['#FEF3C7', '#FDE68A'],
-            'garland': ['#16A34A', '#15803D'],
-            'gift': ['#DC2626', '#2563EB', '#16A34A'],
-            'snowflake': ['#E0E7FF', '#DBEAFE'],
-        }
-        color = random.choice(colors.get(decoration_type, ['#DC2626']))
-        
-        # Create decoration
-        TreeDecoration.objects.create(
-            user=user,
-            decoration_type=decoration_type,
-            position_x=position['x'],
-            position_y=position['y'],
-            color=color,
-            size=random.uniform(0.8, 1.2),
-            is_auto_placed=True,
-            unlocked_by_act=instance
-        )
-        
-        # Update progress
-        progress.update_progress()
+    if created and instance.user_id:
+        with transaction.atomic():
+            # Count the act, then read the progress it produced
+            UserTreeProgress.objects.adjust(instance.user_id, acts=1)
+            allocator = SlotAllocator.for_user(instance.user_id)
+            progress = UserTreeProgress.objects.get(user_id=instance.user_id)
+            
+            existing_types = TreeDecoration.objects.filter(user_id=instance.user_id).values_list(
+                'decoration_type', flat=True
+            ).order_by().distinct()
+            
+            # Create decoration (counted by the TreeDecoration post_save receiver)
+            decoration, = build_decorations(
+                instance.user_id,
+                [(instance.id, progress.total_acts)],
+                existing_types=existing_types,
+                existing_count=progress.total_decorations,
+                total_acts=progress.total_acts,
+                tree_level=progress.tree_level,
+                allocator=allocator,
+            )
+            decoration.save()
 
 
-def _calculate_auto_position(total_acts, existing_count, tree_level):
-    """Calculate automatic position for decoration on tree"""
-    base_y = 15
-    y_spacing = 65 / max(1, total_acts)
-    y_position = base_y + (existing_count * y_spacing)
-    y_position = min(80, max(15, y_position))
+@receiver(acts_bulk_created, sender=Act)
+def auto_decorate_tree_bulk(sender, acts, **kwargs):
+    """Decorate each affected user's tree once for a whole batch of acts"""
+    acts_by_user = {}
+    for act in acts:
+        if act.user_id:
+            acts_by_user.setdefault(act.user_id, []).append(act)
+    
+    decorations = []
+    for user_id, user_acts in acts_by_user.items():
+        UserTreeProgress.objects.adjust(user_id, acts=len(user_acts))
+        # Sent inside bulk_create_acts' transaction, so the lock lasts until commit
+        allocator = SlotAllocator.for_user(user_id)
+        progress = UserTreeProgress.objects.get(user_id=user_id)
+        acts_before = progress.total_acts - len(user_acts)
+        
+        existing_types = TreeDecoration.objects.filter(user_id=user_id).values_list(
+            'decoration_type', flat=True
+        ).order_by().distinct()
+        
+        # One batch per user, numbered as if the acts had arrived one by one
+        decorations.extend(build_decorations(
+            user_id,
+            [(act.id, acts_before + offset + 1) for offset, act in enumerate(user_acts)],
+            existing_types=existing_types,
+            existing_count=progress.total_decorations,
+            total_acts=progress.total_acts,
+            tree_level=progress.tree_level,
+            allocator=allocator,
+        ))
     
-    x_variance = 10 + (tree_level * 5)
-    x_position = 50 + random.uniform(-x_variance, x_variance)
-    x_position = min(70, max(30, x_position))
+    TreeDecoration.objects.bulk_create(decorations)
     
-    return {
-        'x': round(x_position, 2),
-        'y': round(y_position, 2)
-    }
+    # bulk_create skips post_save, so count the decorations here
+    for user_id, user_acts in acts_by_user.items():
+        UserTreeProgress.objects.adjust(user_id, decorations=len(user_acts))
+    bump_tree_version(*acts_by_user)
+
+
+@receiver(post_save, sender=Act)
+def move_act_between_trees(sender, instance, created, **kwargs):
+    """Move an act's count when it is reassigned to another user"""
+    if created:
+        return
+    previous_user_id = instance.previous_value('user_id')
+    if previous_user_id == instance.user_id:
+        return
+    if previous_user_id is not None:
+        UserTreeProgress.objects.adjust(previous_user_id, acts=-1)
+    if instance.user_id is not None:
+        UserTreeProgress.objects.adjust(instance.user_id, acts=1)
+    bump_tree_version(previous_user_id, instance.user_id)
+
+
+@receiver(post_delete, sender=Act)
+def uncount_deleted_act(sender, instance, **kwargs):
+    """Drop a deleted act from its user's progress"""
+    if instance.user_id is not None:
+        UserTreeProgress.objects.adjust(instance.user_id, acts=-1)
+        bump_tree_version(instance.user_id)
+
+
+@receiver(post_save, sender=TreeDecoration)
+def count_decoration(sender, instance, created, **kwargs):
+    """Count a new decoration in its user's progress"""
+    if created:
+        UserTreeProgress.objects.adjust(instance.user_id, decorations=1)
+
+
+@receiver(post_delete, sender=TreeDecoration)
+def uncount_decoration(sender, instance, **kwargs):
+    """Drop a deleted decoration from its user's progress"""
+    UserTreeProgress.objects.adjust(instance.user_id, decorations=-1)
+
 
+@receiver(post_save, sender=TreeDecoration)
+@receiver(post_delete, sender=TreeDecoration)
+def invalidate_tree_snapshot(sender, instance, **kwargs):
+    """Any decoration change gives its user's tree a new version"""
+    bump_tree_version(instance.user_id)
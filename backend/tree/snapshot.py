@@ -0,0 +1,48 @@
+"""
+Versioned per-user tree snapshots.
+
+Every user's UserTreeProgress row carries a tree version that is bumped
+with an F() update, in the same transaction, whenever one of their acts or
+decorations changes. The serialized my_tree payload is cached under
+``(user_id, version)``, so a bump orphans the old snapshot and nothing has
+to be deleted. The version doubles as the response ETag: a client
+revalidating with ``If-None-Match`` gets a 304 from the version alone, and
+an unchanged tree is otherwise served from the cached snapshot.
+
+The version lives in the database rather than the cache, so it can neither
+expire nor be evicted and restart at a number whose snapshot is still
+cached. Users without a progress row have no version (None) and their tree
+is never cached; the row is created by the first counted act or decoration.
+"""
+from django.core.cache import cache
+from django.db.models import F
+from django.utils.http import quote_etag
+
+from .models import UserTreeProgress
+
+TREE_SNAPSHOT_TIMEOUT = 60 * 60
+
+
+def tree_version(user_id):
+    """Return a user's current tree version, or None without a progress row"""
+    return UserTreeProgress.objects.filter(user_id=user_id).values_list('version', flat=True).first()
+
+
+def bump_tree_version(*user_ids):
+    """Give users' trees a new version as part of the current transaction"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        UserTreeProgress.objects.filter(user_id__in=user_ids).update(version=F('version') + 1)
+
+
+def tree_etag(user_id, version):
+    """ETag for a user's tree at a version (per user, since the URL is shared)"""
+    return quote_etag(f'tree-{user_id}-v{version}')
+
+
+def get_snapshot(user_id, version):
+    return cache.get(f'tree_snapshot:{user_id}:v{version}')
+
+
+def set_snapshot(user_id, version, data):
+    cache.set(f'tree_snapshot:{user_id}:v{version}', data, TREE_SNAPSHOT_TIMEOUT)
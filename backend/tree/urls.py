@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TreeDecorationViewSet
+from .views import TreeDecorationViewSet, render_tree, shared_tree
 
 router = DefaultRouter()
 router.register(r'decorations', TreeDecorationViewSet, basename='tree-decoration')
 
 urlpatterns = [
+    path('decorations/render.svg', render_tree, name='tree-render'),
+    path('share/<str:token>.svg', shared_tree, name='tree-share'),
     path('', include(router.urls)),
 ]
 
@@ -1,16 +1,86 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action, api_view, permission_classes, renderer_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db import transaction
 from django.db.models import Count
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
 from .models import TreeDecoration, UserTreeProgress
+from .decorations import build_decorations
+from .placement import SlotAllocator
+from .render import SVGRenderer, tree_svg
+from .snapshot import bump_tree_version, get_snapshot, set_snapshot, tree_etag, tree_version
 from .serializers import (
     TreeDecorationSerializer, 
     UserTreeProgressSerializer,
     TreeSerializer
 )
-import random
-import math
+
+
+def _tree_response(data, etag, cache_status, status_code=status.HTTP_200_OK):
+    """Per-user tree response that browsers must revalidate with its ETag (if any)"""
+    response = Response(data, status=status_code)
+    if etag is not None:
+        response['ETag'] = etag
+    response['X-Cache'] = cache_status
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization', 'Cookie'])
+    return response
+
+
+# Share links carry a signed user id, so trees cannot be enumerated
+share_signer = signing.Signer(salt='tree-share')
+SHARE_MAX_AGE = 60 * 5
+
+
+def _svg_response(request, user_id, public=False):
+    """Rendered tree for a user, answered with 304 when the client has this version"""
+    version = tree_version(user_id)
+    etag = quote_etag(f'tree-svg-{user_id}-v{version}') if version is not None else None
+    if etag is not None and etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        try:
+            svg = tree_svg(user_id, version)
+        except User.DoesNotExist:
+            raise Http404('Tree not found')
+        response = HttpResponse(svg, content_type='image/svg+xml; charset=utf-8')
+        # Static drawing only: never run anything embedded in the document
+        response['Content-Security-Policy'] = "default-src 'none'; style-src 'unsafe-inline'"
+    if etag is not None:
+        response['ETag'] = etag
+    if public:
+        patch_cache_control(response, public=True, max_age=SHARE_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization', 'Cookie'])
+    return response
+
+
+@api_view(['GET'])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, SVGRenderer])
+@permission_classes([IsAuthenticated])
+def render_tree(request):
+    """Current user's tree rendered as SVG"""
+    return _svg_response(request, request.user.id)
+
+
+@api_view(['GET'])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, SVGRenderer])
+@permission_classes([AllowAny])
+def shared_tree(request, token):
+    """Publicly shared tree rendered as SVG (for share links and link previews)"""
+    try:
+        user_id = int(share_signer.unsign(token))
+    except (signing.BadSignature, ValueError):
+        raise Http404('Tree not found')
+    return _svg_response(request, user_id, public=True)
 
 
 class TreeDecorationViewSet(viewsets.ModelViewSet):
@@ -23,102 +93,96 @@ class TreeDecorationViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """Automatically assign decoration to current user"""
+        # Progress is counted by the TreeDecoration post_save receiver
         serializer.save(user=self.request.user, is_auto_placed=False)
-        # Update progress
-        progress, _ = UserTreeProgress.objects.get_or_create(user=self.request.user)
-        progress.update_progress()
     
     def perform_update(self, serializer):
         """Update decoration"""
-        serializer.save()
+        instance = serializer.instance
+        moved = any(
+            field in serializer.validated_data
+            and serializer.validated_data[field] != getattr(instance, field)
+            for field in ('position_x', 'position_y')
+        )
+        if moved and instance.slot is not None:
+            # Placed by hand now, so give its grid slot back
+            serializer.save(slot=None)
+        else:
+            serializer.save()
     
     def perform_destroy(self, instance):
-        """Delete decoration and update progress"""
+        """Delete decoration, freeing its grid slot (progress is updated by the post_delete receiver)"""
         instance.delete()
-        progress, _ = UserTreeProgress.objects.get_or_create(user=self.request.user)
-        progress.update_progress()
     
     @action(detail=False, methods=['get'])
     def my_tree(self, request):
         """Get user's complete tree with decorations and progress"""
         user = request.user
         
-        # Get or create progress
-        progress, _ = UserTreeProgress.objects.get_or_create(user=user)
-        progress.update_progress()
-        
-        # Get all decorations
-        decorations = TreeDecoration.objects.filter(user=user)
-        existing_count = decorations.count()
+        # An unchanged tree costs a version read: 304 when the client already
+        # has it, otherwise the snapshot cached for that version
+        version = tree_version(user.id)
+        etag = tree_etag(user.id, version) if version is not None else None
+        if etag is not None:
+            if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                return _tree_response(None, etag, 'HIT', status_code=status.HTTP_304_NOT_MODIFIED)
+            tree_data = get_snapshot(user.id, version)
+            if tree_data is not None:
+                return _tree_response(tree_data, etag, 'HIT')
+        
+        # Read progress without writing; counters are maintained incrementally
+        progress = UserTreeProgress.objects.for_user(user)
+        
+        # Sync decorations: create missing decorations if acts > decorations.
+        # Everything is computed in memory and inserted with one bulk_create,
+        # so the first load costs a constant number of queries. The existing
+        # decorations are read under the tree lock, so two concurrent loads
+        # cannot both decorate the same acts.
         total_acts = progress.total_acts
-        
-        # Sync decorations: Create missing decorations if acts > decorations
-        if total_acts > existing_count:
-            from acts.models import Act
-            
-            # Get all user's acts ordered by creation
-            all_acts = Act.objects.filter(user=user).order_by('created_at')
-            
-            # Get acts that already have decorations
-            acts_with_decorations = set(
-                TreeDecoration.objects.filter(user=user)
-                .exclude(unlocked_by_act__isnull=True)
-                .values_list('unlocked_by_act_id', flat=True)
-            )
-            
-            # Get existing decoration types once (to track what's already on tree)
-            existing_decoration_types = list(
-                TreeDecoration.objects.filter(user=user)
-                .values_list('decoration_type', flat=True)
+        new_decorations = []
+        with transaction.atomic():
+            allocator = SlotAllocator.for_user(user.id)
+            existing = list(
+                TreeDecoration.objects.filter(user=user).values_list('unlocked_by_act_id', 'decoration_type')
             )
+            existing_count = len(existing)
             
-            # Create decorations for acts that don't have them
-            for idx, act in enumerate(all_acts):
-                if act.id not in acts_with_decorations:
-                    # Act number is 1-indexed (first act = 1, second = 2, etc.)
-                    act_number = idx + 1
-                    
-                    # Determine decoration type based on act number and existing types
-                    decoration_type = self._determine_decoration_type(
-                        act_number, 
-                        existing_count, 
-                        existing_decoration_types
-                    )
-                    
-                    # Track this decoration type for next iterations
-                    existing_decoration_types.append(decoration_type)
-                    
-                    # Calculate position
-                    position = self._calculate_auto_position(total_acts, existing_count, progress.tree_level)
-                    
-                    # Get color
-                    colors = {
-                        'ornament': ['#DC2626', '#16A34A', '#D97706', '#2563EB', '#9333EA'],
-                        'star': ['#FBBF24', '#FCD34D'],
-                        'light': ['#FEF3C7', '#FDE68A'],
-                        'garland': ['#16A34A', '#15803D'],
-                        'gift': ['#DC2626', '#2563EB', '#16A34A'],
-                        'snowflake': ['#E0E7FF', '#DBEAFE'],
-                    }
-                    color = random.choice(colors.get(decoration_type, ['#DC2626']))
-                    
-                    # Create decoration
-                    TreeDecoration.objects.create(
-                        user=user,
-                        decoration_type=decoration_type,
-                        position_x=position['x'],
-                        position_y=position['y'],
-                        color=color,
-                        size=random.uniform(0.8, 1.2),
-                        is_auto_placed=True,
-                        unlocked_by_act=act
-                    )
-                    
-                    existing_count += 1
-            
-            # Refresh decorations after creating new ones
-            decorations = TreeDecoration.objects.filter(user=user)
-            progress.update_progress()
+            if total_acts > existing_count:
+                from acts.models import Act
+                
+                # Acts that already have decorations, and the types already on the tree
+                acts_with_decorations = {act_id for act_id, _ in existing if act_id is not None}
+                existing_decoration_types = [decoration_type for _, decoration_type in existing]
+                
+                # Get all user's act ids ordered by creation
+                all_act_ids = Act.objects.filter(user=user).order_by('created_at').values_list('id', flat=True)
+                
+                # Build decorations for acts that don't have them in one batch,
+                # taking grid slots for all of them at once; act numbers are
+                # 1-indexed (first act = 1, second = 2, etc.)
+                new_decorations = build_decorations(
+                    user.id,
+                    [
+                        (act_id, idx + 1)
+                        for idx, act_id in enumerate(all_act_ids)
+                        if act_id not in acts_with_decorations
+                    ],
+                    existing_types=existing_decoration_types,
+                    existing_count=existing_count,
+                    total_acts=total_acts,
+                    tree_level=progress.tree_level,
+                    allocator=allocator,
+                )
+                
+                if new_decorations:
+                    TreeDecoration.objects.bulk_create(new_decorations)
+                    # bulk_create skips post_save, so count the decorations here
+                    UserTreeProgress.objects.adjust(user.id, decorations=len(new_decorations))
+                    bump_tree_version(user.id)
+        if new_decorations:
+            progress.total_decorations += len(new_decorations)
+        
+        decorations = TreeDecoration.objects.filter(user=user)
         
         # Build response
         tree_data = {
@@ -131,66 +195,23 @@ class TreeDecorationViewSet(viewsets.ModelViewSet):
             'progress': UserTreeProgressSerializer(progress).data,
         }
         
-        return Response(tree_data)
+        # Never older than the version read above, so safe to cache under it
+        if version is not None:
+            set_snapshot(user.id, version, tree_data)
+        return _tree_response(tree_data, etag, 'MISS')
     
-    def _determine_decoration_type(self, act_number, existing_count, all_decoration_types=None):
-        """Determine decoration type based on act number and milestones"""
-        # Track what decoration types already exist to ensure milestone decorations appear
-        existing_types = all_decoration_types or []
-        
-        # Milestone-based unlocks (guaranteed at specific act numbers)
-        if act_number == 5:
-            # Act 5 always gets a star (milestone: Star Topper)
-            return 'star'
-        elif act_number == 10:
-            # Act 10 always gets a light (milestone: Lights)
-            return 'light'
-        elif act_number == 15:
-            # Act 15 always gets a garland (milestone: Garland)
-            return 'garland'
-        elif act_number == 25:
-            # Act 25 always gets a snowflake (milestone: Snowflakes)
-            return 'snowflake'
-        elif act_number == 50:
-            # Act 50 gets a special decoration (milestone: Golden Ornaments)
-            return random.choice(['star', 'ornament'])  # Could be golden ornament
-        elif act_number == 100:
-            # Act 100 gets a special decoration (milestone: Special Tree Topper)
-            return random.choice(['star', 'gift'])
-        
-        # For other acts, use milestone-based random selection
-        if act_number >= 100:
-            return random.choice(['ornament', 'star', 'snowflake', 'gift'])
-        elif act_number >= 50:
-            # Ensure at least some variety
-            if 'star' not in existing_types and random.random() < 0.3:
-                return 'star'
-            return random.choice(['ornament', 'star', 'snowflake'])
-        elif act_number >= 25:
-            # Ensure snowflakes appear
-            if 'snowflake' not in existing_types and random.random() < 0.4:
-                return 'snowflake'
-            return random.choice(['ornament', 'snowflake'])
-        elif act_number >= 15:
-            # Ensure garlands appear
-            if 'garland' not in existing_types and random.random() < 0.4:
-                return 'garland'
-            return random.choice(['ornament', 'garland'])
-        elif act_number >= 10:
-            # Ensure lights appear (since milestone unlocked at 10)
-            if 'light' not in existing_types and random.random() < 0.5:
-                return 'light'
-            return random.choice(['ornament', 'light'])
-        elif act_number >= 5:
-            return 'ornament'
-        else:
-            return 'ornament'
+    @action(detail=False, methods=['get'])
+    def share(self, request):
+        """Get a public link to the current user's rendered tree"""
+        token = share_signer.sign(str(request.user.id))
+        return Response({
+            'url': request.build_absolute_uri(reverse('tree-share', args=[token])),
+        })
     
     @action(detail=False, methods=['get'])
     def progress(self, request):
         """Get user's tree progress"""
-        progress, _ = UserTreeProgress.objects.get_or_create(user=request.user)
-        progress.update_progress()
+        progress = UserTreeProgress.objects.for_user(request.user)
         return Response(UserTreeProgressSerializer(progress).data)
     
     @action(detail=False, methods=['post'])
@@ -199,91 +220,29 @@ class TreeDecorationViewSet(viewsets.ModelViewSet):
         user = request.user
         act_id = request.data.get('act_id')
         
-        # Get user's existing decorations count
-        existing_count = TreeDecoration.objects.filter(user=user).count()
-        
         # Determine decoration type based on acts count
-        progress, _ = UserTreeProgress.objects.get_or_create(user=user)
-        progress.update_progress()
+        progress = UserTreeProgress.objects.for_user(user)
+        existing_count = progress.total_decorations
         
         total_acts = progress.total_acts
         
-        # Unlock system
-        decoration_type = 'ornament'  # Default
-        if total_acts >= 100:
-            decoration_type = random.choice(['ornament', 'star', 'snowflake', 'gift'])
-        elif total_acts >= 50:
-            decoration_type = random.choice(['ornament', 'star', 'snowflake'])
-        elif total_acts >= 25:
-            decoration_type = random.choice(['ornament', 'snowflake'])
-        elif total_acts >= 15:
-            decoration_type = random.choice(['ornament', 'garland'])
-        elif total_acts >= 10:
-            decoration_type = random.choice(['ornament', 'light'])
-        elif total_acts >= 5:
-            decoration_type = 'star' if existing_count == 0 else 'ornament'
-        else:
-            decoration_type = 'ornament'
-        
-        # Calculate auto position
-        position = self._calculate_auto_position(total_acts, existing_count, progress.tree_level)
-        
-        # Color based on decoration type
-        colors = {
-            'ornament': ['#DC2626', '#16A34A', '#D97706', '#2563EB', '#9333EA'],  # Red, Green, Orange, Blue, Purple
-            'star': ['#FBBF24', '#FCD34D'],  # Gold, Light Gold
-            'light': ['#FEF3C7', '#FDE68A'],  # Warm White, Light Yellow
-            'garland': ['#16A34A', '#15803D'],  # Green shades
-            'gift': ['#DC2626', '#2563EB', '#16A34A'],  # Red, Blue, Green
-            'snowflake': ['#E0E7FF', '#DBEAFE'],  # Light Blue, Light Blue
-        }
-        color = random.choice(colors.get(decoration_type, ['#DC2626']))
-        
-        # Create decoration
-        decoration = TreeDecoration.objects.create(
-            user=user,
-            decoration_type=decoration_type,
-            position_x=position['x'],
-            position_y=position['y'],
-            color=color,
-            size=random.uniform(0.8, 1.2),
-            is_auto_placed=True,
-            unlocked_by_act_id=act_id if act_id else None
-        )
-        
-        # Update progress
-        progress.update_progress()
+        # Create decoration (counted by the TreeDecoration post_save receiver)
+        with transaction.atomic():
+            decoration, = build_decorations(
+                user.id,
+                [(act_id or None, total_acts)],
+                existing_types=TreeDecoration.objects.filter(user=user).values_list(
+                    'decoration_type', flat=True
+                ).order_by().distinct(),
+                existing_count=existing_count,
+                total_acts=total_acts,
+                tree_level=progress.tree_level,
+                allocator=SlotAllocator.for_user(user.id),
+            )
+            decoration.save()
         
         return Response(
             TreeDecorationSerializer(decoration).data,
             status=status.HTTP_201_CREATED
         )
     
-    def _calculate_auto_position(self, total_acts, existing_count, tree_level):
-        """Calculate automatic position for decoration on tree"""
-        # Tree is roughly triangular
-        # X: 30-70% (centered area)
-        # Y: Spread vertically based on count
-        
-        # Base Y position
-        base_y = 15  # Start from top
-        
-        # Spread decorations vertically
-        y_spacing = 65 / max(1, total_acts)  # Distribute over 65% of tree height
-        y_position = base_y + (existing_count * y_spacing)
-        
-        # Ensure Y stays within tree bounds
-        y_position = min(80, max(15, y_position))
-        
-        # X position: slightly random but centered
-        # More variation for higher tree levels
-        x_variance = 10 + (tree_level * 5)
-        x_position = 50 + random.uniform(-x_variance, x_variance)
-        
-        # Ensure X stays within tree bounds
-        x_position = min(70, max(30, x_position))
-        
-        return {
-            'x': round(x_position, 2),
-            'y': round(y_position, 2)
-        }
@@ -1,18 +1,23 @@
 import React from 'react';
-import { exportToCSV, exportToJSON } from '../../utils/export';
+import { exportToJSON } from '../../utils/export';
+import { actsAPI } from '../../services/api';
 import { Download, FileText, Table } from 'lucide-react';
 import './ExportButton.css';
 
 const ExportButton = ({ acts, stats }) => {
   const handleExport = (format) => {
+    if (format === 'csv') {
+      // Stream every act from the server rather than only the ones loaded here
+      window.location.href = actsAPI.getExportUrl({ format: 'csv' });
+      return;
+    }
+
     if (!acts || acts.length === 0) {
       alert('No data to export');
       return;
     }
 
-    if (format === 'csv') {
-      exportToCSV(acts, 'santa_acts');
-    } else if (format === 'json') {
+    if (format === 'json') {
       exportToJSON(acts, 'santa_acts');
     }
   };
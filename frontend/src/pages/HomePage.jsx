@@ -118,7 +118,7 @@ const HomePage = () => {
       const nearbyResponse = await actsAPI.nearbyActs({
         lat: coords.lat,
         lng: coords.lng,
-        radius: 0.05,
+        radius_m: 5000,
       });
       
       if (nearbyResponse.data.acts && nearbyResponse.data.acts.length > 0) {
@@ -5,7 +5,7 @@ import { treeAPI } from '../services/api';
 import TreeCanvas from '../components/Tree/TreeCanvas';
 import TreeProgress from '../components/Tree/TreeProgress';
 import { Sparkles, RefreshCw, Share2, Gift, Edit2, Save, X, Download, Image as ImageIcon } from 'lucide-react';
-import { exportTreeAsImage, downloadTreeImage, shareTreeImage } from '../utils/treeExport';
+import { exportTreeAsImage, downloadTreeImage } from '../utils/treeExport';
 import './MyTreePage.css';
 
 const MyTreePage = () => {
@@ -76,56 +76,28 @@ const MyTreePage = () => {
   };
 
   const handleShare = async () => {
-    if (!treeCanvasRef.current || !treeData) {
-      // Fallback to URL sharing if tree not ready
-      if (navigator.share) {
-        try {
-          await navigator.share({
-            title: "My Christmas Tree of Kindness",
-            text: `Check out my tree with ${treeData?.total_decorations || 0} decorations!`,
-            url: window.location.href,
-          });
-        } catch {
-          console.log('Share cancelled');
-        }
-      } else {
-        navigator.clipboard.writeText(window.location.href);
-        alert('Link copied to clipboard!');
-      }
-      return;
-    }
-
     setIsExporting(true);
+    // Share a link to the tree rendered by the server (also used for link previews)
+    let url = window.location.href;
     try {
-      const treeElement = treeCanvasRef.current.getElement();
-      if (!treeElement) {
-        throw new Error('Tree element not found');
-      }
-
-      // Capture the entire tree-canvas-container to preserve all positioning
-      const elementToCapture = treeElement;
-
-      // Export tree as image
-      const blob = await exportTreeAsImage(elementToCapture, treeData, user?.username || 'User');
-      
-      // Share the image
-      const shareText = `Check out my Christmas Tree of Kindness! 🎄\n${treeData?.total_acts || 0} acts of kindness • ${treeData?.total_decorations || 0} decorations • Level ${treeData?.tree_level || 1}`;
-      await shareTreeImage(blob, shareText);
+      const response = await treeAPI.getShareLink();
+      url = response.data.url;
     } catch (error) {
-      console.error('Error sharing tree:', error);
-      // Fallback to URL sharing
+      console.error('Error getting share link:', error);
+    }
+    try {
       if (navigator.share) {
         try {
           await navigator.share({
             title: "My Christmas Tree of Kindness",
-            text: `Check out my tree with ${treeData?.total_decorations || 0} decorations!`,
-            url: window.location.href,
+            text: `Check out my Christmas Tree of Kindness! 🎄\n${treeData?.total_acts || 0} acts of kindness • ${treeData?.total_decorations || 0} decorations • Level ${treeData?.tree_level || 1}`,
+            url,
           });
         } catch {
           console.log('Share cancelled');
         }
       } else {
-        navigator.clipboard.writeText(window.location.href);
+        await navigator.clipboard.writeText(url);
         alert('Link copied to clipboard!');
       }
     } finally {
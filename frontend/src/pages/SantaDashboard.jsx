@@ -164,7 +164,7 @@ const SantaDashboard = () => {
       const nearbyResponse = await actsAPI.nearbyActs({
         lat: coords.lat,
         lng: coords.lng,
-        radius: 0.05, // ~5km radius (increased for better results)
+        radius_m: 5000, // 5km great-circle radius
       });
       
       if (nearbyResponse.data.acts && nearbyResponse.data.acts.length > 0) {
@@ -100,17 +100,38 @@ export const actsAPI = {
   // Delete act
   delete: (id) => api.delete(`/acts/${id}/`),
 
+  // Appreciate an act (once per user)
+  appreciate: (id) => api.post(`/acts/${id}/appreciate/`),
+
   // Get statistics
   getStats: () => api.get('/acts/stats/'),
 
+  // Get act counts over time ({ granularity: 'day' | 'week' | 'month', start_date, end_date, category, country, city })
+  getTimeseries: (params = {}) => api.get('/acts/timeseries/', { params }),
+
   // Get region data
   getRegion: (params) => api.get('/acts/region/', { params }),
 
   // Get nearby acts
   nearbyActs: (params) => api.get('/acts/nearby_acts/', { params }),
 
+  // Get acts changed and ids deleted since a sync token ({ since, fields }); omit since for a full sync
+  getChanges: (params = {}) => api.get('/acts/changes/', { params }),
+
+  // Server-Sent Events URL for newly created acts ({ category, bbox: 'minLng,minLat,maxLng,maxLat' }), for EventSource
+  getLiveFeedUrl: (params = {}) => `${API_BASE_URL}/acts/live/?${new URLSearchParams(params)}`,
+
   // Get community feed (acts with images)
   getCommunity: (params = {}) => api.get('/acts/community/', { params }),
+
+  // Get pre-aggregated map clusters ({ bbox: 'minLng,minLat,maxLng,maxLat', zoom })
+  getClusters: (params) => api.get('/acts/clusters/', { params }),
+
+  // Get packed binary act points for one map tile
+  getTile: (z, x, y) => api.get(`/acts/tiles/${z}/${x}/${y}/`, { responseType: 'arraybuffer' }),
+
+  // Download URL for a streamed server-side export ({ format: 'csv' | 'ndjson', category, city, start_date, end_date, search })
+  getExportUrl: (params = {}) => `${API_BASE_URL}/acts/export/?${new URLSearchParams({ format: 'csv', ...params })}`,
 };
 
 // Auth API
@@ -147,6 +168,12 @@ export const treeAPI = {
 
   // Auto-decorate (triggered on act creation)
   autoDecorate: (actId) => api.post('/tree/decorations/auto_decorate/', { act_id: actId }),
+
+  // Server-rendered SVG of the current user's tree (needs the auth header)
+  getTreeSvg: () => api.get('/tree/decorations/render.svg', { responseType: 'text' }),
+
+  // Public link to the rendered tree, for sharing and link previews
+  getShareLink: () => api.get('/tree/decorations/share/'),
 };
 
 // Chat API